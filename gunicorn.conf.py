@@ -0,0 +1,45 @@
+"""Gunicorn settings for the ESKLENCHEN backend.
+
+Gunicorn loads this file automatically from the working directory, so the
+start command in Procfile / railway.json picks it up unchanged.
+"""
+import os
+
+# A few processes, each serving requests from a small thread pool so slow
+# clients and file transfers don't block other requests. The CPUs visible
+# to this process can be far more than the container's quota, and every
+# worker holds its own database pool, so the default is capped at 4; set
+# WEB_CONCURRENCY to size it explicitly.
+workers = int(os.environ.get('WEB_CONCURRENCY', min(len(os.sched_getaffinity(0)), 4)))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# With GUNICORN_WORKER_CLASS=gevent the worker monkey-patches the stdlib
+# before importing the app, and each process multiplexes this many
+# connections over greenlets instead of a fixed thread pool. gevent is
+# optional: install requirements-gevent.txt to use it.
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Reuse client connections between requests
+keepalive = 5
+
+
+def post_worker_init(worker):
+    """Make psycopg2 cooperative under gevent when it is in use"""
+    # Check the worker itself: -k on the command line overrides worker_class
+    if not isinstance(worker, _gevent_worker_class()):
+        return
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        return
+    patch_psycopg()
+
+
+def _gevent_worker_class():
+    """Return gunicorn's gevent worker class, or () when gevent isn't installed"""
+    try:
+        from gunicorn.workers.ggevent import GeventWorker
+    except (ImportError, RuntimeError):  # RuntimeError: gevent not installed
+        return ()
+    return GeventWorker
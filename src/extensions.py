@@ -0,0 +1,74 @@
+"""Flask extension instances shared across the ESKLENCHEN app.
+
+Models and routes import db from here so there is a single engine,
+connection pool and metadata; create_app() binds it with db.init_app().
+"""
+import logging
+import sqlite3
+
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+db = SQLAlchemy()
+logger = logging.getLogger(__name__)
+
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune SQLite connections for a multi-threaded web server
+
+    WAL lets readers proceed while another request is writing, and
+    synchronous=NORMAL is the durable-enough setting recommended with WAL.
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA cache_size=-64000')  # 64 MB page cache
+    cursor.close()
+
+
+# Trigram GIN indexes let Postgres serve the substring (LIKE '%...%')
+# searches on clients and projects from an index. They need pg_trgm and
+# are skipped on other databases, where those searches stay table scans.
+# On managed Postgres the app role may not be allowed to create extensions;
+# have it installed when provisioning the database, otherwise create_all()
+# logs a warning and leaves the trigram indexes out.
+@event.listens_for(db.metadata, 'before_create')
+def _create_pg_trgm(target, connection, **kw):
+    """Install pg_trgm if possible and record whether it is available"""
+    if connection.dialect.name != 'postgresql':
+        return
+    try:
+        # A failed statement aborts the whole Postgres transaction, so try
+        # inside a savepoint and roll back just that on failure.
+        with connection.begin_nested():
+            connection.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        available = True
+    except DBAPIError as e:
+        available = connection.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        ).first() is not None
+        if not available:
+            logger.warning("pg_trgm unavailable, skipping trigram indexes: %s", e.orig)
+    connection.info['pg_trgm'] = available
+
+
+def _has_pg_trgm(ddl, target, bind, **kw):
+    return bind is not None and bind.info.get('pg_trgm', False)
+
+
+def trigram_index(name, column):
+    """Postgres-only GIN trigram index on column for substring searches
+
+    Created only when pg_trgm was available to create_all().
+    """
+    return db.Index(
+        name,
+        column,
+        postgresql_using='gin',
+        postgresql_ops={column: 'gin_trgm_ops'}
+    ).ddl_if(dialect='postgresql', callable_=_has_pg_trgm)
@@ -0,0 +1,100 @@
+"""Legal page content shared by the ESKLENCHEN Flask apps.
+
+The pages never change, so each JSON body is encoded (and gzip-compressed)
+once at import time and served with a strong ETag and a one-day
+Cache-Control, letting browsers and CDNs revalidate with a 304 instead of
+downloading it again.
+"""
+import gzip
+import hashlib
+
+from flask import Response, request
+
+from src.serialization import dumps
+
+PRIVACY_HTML = """
+        <h1>Política de Privacidad - ESKLENCHEN</h1>
+        
+        <h2>1. Responsable del Tratamiento</h2>
+        <p>ESKLENCHEN Real Estate Solutions es responsable del tratamiento de sus datos personales.</p>
+        
+        <h2>2. Datos que Recopilamos</h2>
+        <p>Recopilamos los siguientes tipos de datos:</p>
+        <ul>
+            <li>Datos de contacto (nombre, email, teléfono)</li>
+            <li>Información de inversión y preferencias</li>
+            <li>Datos de navegación y cookies</li>
+        </ul>
+        
+        <h2>3. Finalidad del Tratamiento</h2>
+        <p>Utilizamos sus datos para:</p>
+        <ul>
+            <li>Proporcionar nuestros servicios de inversión inmobiliaria</li>
+            <li>Comunicarnos con usted sobre oportunidades de inversión</li>
+            <li>Cumplir con obligaciones legales</li>
+        </ul>
+        
+        <h2>4. Base Legal</h2>
+        <p>El tratamiento se basa en su consentimiento y en la ejecución de contratos.</p>
+        
+        <h2>5. Derechos del Usuario</h2>
+        <p>Tiene derecho a acceder, rectificar, suprimir y portar sus datos.</p>
+        
+        <h2>6. Contacto</h2>
+        <p>Para ejercer sus derechos, contacte: contact@esklenchen.com</p>
+        """
+
+COOKIES_HTML = """
+        <h1>Política de Cookies - ESKLENCHEN</h1>
+        
+        <h2>¿Qué son las cookies?</h2>
+        <p>Las cookies son pequeños archivos de texto que se almacenan en su dispositivo cuando visita nuestro sitio web.</p>
+        
+        <h2>Tipos de cookies que utilizamos</h2>
+        <ul>
+            <li><strong>Cookies técnicas:</strong> Necesarias para el funcionamiento del sitio</li>
+            <li><strong>Cookies analíticas:</strong> Para analizar el uso del sitio web</li>
+            <li><strong>Cookies de personalización:</strong> Para recordar sus preferencias</li>
+        </ul>
+        
+        <h2>Gestión de cookies</h2>
+        <p>Puede gestionar las cookies desde la configuración de su navegador.</p>
+        
+        <h2>Cookies de terceros</h2>
+        <p>Utilizamos Google Analytics para analizar el tráfico del sitio web.</p>
+        """
+
+
+def _encode(html):
+    body = dumps({'success': True, 'content': html})
+    return body, gzip.compress(body, 9), hashlib.md5(body).hexdigest()
+
+
+_PRIVACY = _encode(PRIVACY_HTML)
+_COOKIES = _encode(COOKIES_HTML)
+
+
+def _cached_json(entry):
+    body, body_gz, etag = entry
+    if request.accept_encodings['gzip']:
+        response = Response(body_gz, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+        # Each encoding is a separate representation with its own ETag
+        etag += '-gz'
+    else:
+        response = Response(body, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response.make_conditional(request)
+
+
+def privacy_response():
+    """Return the privacy policy JSON response (304 if the client has it)"""
+    return _cached_json(_PRIVACY)
+
+
+def cookies_response():
+    """Return the cookies policy JSON response (304 if the client has it)"""
+    return _cached_json(_COOKIES)
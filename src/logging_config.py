@@ -0,0 +1,41 @@
+"""Logging setup shared by the ESKLENCHEN Flask apps.
+
+Records are put on an in-memory queue by the request threads and written
+to stderr by a single background listener thread, so a slow or contended
+stderr never blocks a request.
+"""
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from flask.logging import default_handler
+
+_listener = None
+
+
+def configure_logging(app, level=logging.INFO):
+    """Route the root logger and app.logger through a background queue"""
+    global _listener
+
+    if _listener is None:
+        log_queue = queue.SimpleQueue()
+
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(QueueHandler(log_queue))
+
+        _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+    logging.getLogger().setLevel(level)
+
+    # app.logger propagates to the root queue handler; Flask's own stderr
+    # handler would otherwise write synchronously from the request thread
+    app.logger.removeHandler(default_handler)
+    app.logger.setLevel(level)
@@ -1,161 +1,308 @@
-from flask import Flask, jsonify, request, send_from_directory
-from flask_cors import CORS
+from flask import Flask, Response, abort, request, send_file
+from werkzeug.utils import safe_join
+import msgspec
+import gzip
 import os
+import time
 from datetime import datetime
+from types import MappingProxyType
 import logging
 
+from src.serialization import dumps
+from src.logging_config import configure_logging
+from src.legal import cookies_response, privacy_response
+from src.static_files import load_index
+from src.schemas import (
+    PartialContactRequest, PropertyAnalysisRequest, RenovationProposalRequest, decode
+)
+
+
+# Landing page served when the React build is missing
+_FALLBACK_HTML = """<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>ESKLENCHEN - Inversión Inmobiliaria</title>
+    <style>
+        body {
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            margin: 0;
+            padding: 0;
+            background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%);
+            color: white;
+            min-height: 100vh;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+        }
+        .container {
+            text-align: center;
+            max-width: 800px;
+            padding: 40px 20px;
+        }
+        .logo {
+            font-size: 3rem;
+            font-weight: bold;
+            margin-bottom: 20px;
+            color: #ffd700;
+        }
+        .tagline {
+            font-size: 1.5rem;
+            margin-bottom: 30px;
+            opacity: 0.9;
+        }
+        .services {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+            gap: 20px;
+            margin: 40px 0;
+        }
+        .service {
+            background: rgba(255, 255, 255, 0.1);
+            padding: 20px;
+            border-radius: 10px;
+            backdrop-filter: blur(10px);
+        }
+        .contact {
+            margin-top: 40px;
+            padding: 20px;
+            background: rgba(255, 215, 0, 0.1);
+            border-radius: 10px;
+        }
+        .phone {
+            font-size: 1.5rem;
+            font-weight: bold;
+            color: #ffd700;
+            margin: 10px 0;
+        }
+        .badges {
+            display: flex;
+            justify-content: center;
+            gap: 20px;
+            margin-top: 30px;
+            flex-wrap: wrap;
+        }
+        .badge {
+            background: rgba(255, 255, 255, 0.2);
+            padding: 10px 15px;
+            border-radius: 20px;
+            font-size: 0.9rem;
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="logo">ESKLENCHEN</div>
+        <div class="tagline">Inversión Inmobiliaria Inteligente</div>
+
+        <div class="services">
+            <div class="service">
+                <h3>🏠 Reforma sin Coste</h3>
+                <p>Reformamos tu propiedad sin inversión inicial. Recuperas la inversión con la venta.</p>
+            </div>
+            <div class="service">
+                <h3>📊 Análisis con IA</h3>
+                <p>Valoraciones automáticas con inteligencia artificial y análisis de mercado.</p>
+            </div>
+            <div class="service">
+                <h3>💼 Gestión Integral</h3>
+                <p>Nos encargamos de todo: compra, reforma, gestión y venta de propiedades.</p>
+            </div>
+            <div class="service">
+                <h3>⭐ Experiencias Premium</h3>
+                <p>Servicios de alta calidad para huéspedes y máxima rentabilidad.</p>
+            </div>
+        </div>
+
+        <div class="contact">
+            <h3>Contacta con Nosotros</h3>
+            <div class="phone">📞 +34 624 737 299</div>
+            <p>contact@esklenchen.com</p>
+            <p>Especialistas en inversión inmobiliaria con más de 10 años de experiencia</p>
+        </div>
+
+        <div class="badges">
+            <div class="badge">🔒 SSL Secure</div>
+            <div class="badge">🛡️ GDPR Compliant</div>
+            <div class="badge">💳 Secure Payment</div>
+            <div class="badge">✅ Verified Business</div>
+        </div>
+    </div>
+</body>
+</html>
+""".encode('utf-8')
+_FALLBACK_HTML_GZ = gzip.compress(_FALLBACK_HTML, 9)
+
+
+# Average price per m² used by the simulated property analysis
+_PRICE_PER_M2 = MappingProxyType({
+    'Barcelona': 4500,
+    'Madrid': 4200,
+    'Valencia': 2800,
+    'Sevilla': 2500,
+    'Bilbao': 3800,
+    'Badalona': 3200
+})
+
+# Static parts of the analysis and proposal payloads (never mutated)
+_ANALYSIS_FACTORS = {
+    'location_score': 8.5,
+    'market_trend': 'positive',
+    'renovation_potential': 'high',
+    'rental_yield': 6.2
+}
+_ANALYSIS_RECOMMENDATIONS = (
+    'Excelente oportunidad de inversión',
+    'Ubicación con alta demanda',
+    'Potencial de revalorización alto',
+    'Reforma recomendada para maximizar ROI'
+)
+_RENOVATION_AREAS = (
+    # (area, share of budget, priority)
+    ('Cocina', 0.3, 'high'),
+    ('Baños', 0.25, 'high'),
+    ('Suelos', 0.2, 'medium'),
+    ('Pintura', 0.15, 'medium'),
+    ('Instalaciones', 0.1, 'low')
+)
+_FINANCING_OPTIONS = {
+    'reforma_sin_coste': True,
+    'payment_on_sale': True,
+    'guaranteed_roi': True
+}
+_NEXT_STEPS = (
+    'Visita técnica gratuita',
+    'Presupuesto detallado',
+    'Planificación de obra',
+    'Inicio de reforma'
+)
+
+
+# Renovation costs 15% of the value and adds 25% to it, so the ROI is the
+# same for every property: (1.25 - 1 - 0.15) / (1 + 0.15)
+_ROI_PERCENTAGE = (0.10 / 1.15) * 100
+_ROI_PERCENTAGE_ROUNDED = round(_ROI_PERCENTAGE, 2)
+
+# Fields of the analysis payload that are identical for every request,
+# pre-encoded without the surrounding braces
+_ANALYSIS_CONSTANT_FIELDS = dumps({
+    'roi_percentage': _ROI_PERCENTAGE_ROUNDED,
+    'confidence_level': 87.5,
+    'analysis_factors': _ANALYSIS_FACTORS,
+    'recommendations': _ANALYSIS_RECOMMENDATIONS
+})[1:-1]
+
+
+def _estimate_property(surface, base_price_per_m2):
+    """Return (estimated_value, renovation_cost, potential_value)"""
+    estimated_value = surface * base_price_per_m2
+    return estimated_value, estimated_value * 0.15, estimated_value * 1.25
+
+
+def _reference_id(prefix, now):
+    """Return prefix followed by the UTC time now (epoch seconds) as YYYYmmddHHMMSS"""
+    return prefix + time.strftime('%Y%m%d%H%M%S', time.gmtime(now))
+
+
+# One year, the conventional lifetime for fingerprinted static assets
+_ASSET_MAX_AGE = 365 * 24 * 60 * 60
+
+
+# CORS is open to every origin, so the headers never change
+_CORS_PREFLIGHT_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, HEAD, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+    'Access-Control-Max-Age': '86400'
+}
+
+
+def ojsonify(obj):
+    """Build a JSON response using the fast serializer"""
+    return Response(dumps(obj), mimetype='application/json')
+
 def create_app():
     """Create and configure Flask application"""
-    app = Flask(__name__, static_folder='../static', static_url_path='')
+    # Flask's own static route lives under /static so it doesn't shadow the
+    # SPA catch-all below, which serves the build from the site root
+    app = Flask(__name__, static_folder='../static', static_url_path='/static')
     
     # Configuration
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'esklenchen-secret-key-2025')
-    
+
+    # Static files are handed to wsgi.file_wrapper, which gunicorn serves with
+    # sendfile(2). Behind a proxy that understands X-Sendfile, let it stream them.
+    app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+
     # Enable CORS for all routes
-    CORS(app, origins="*", allow_headers=["Content-Type", "Authorization"])
+    @app.before_request
+    def cors_preflight():
+        # Only for matched routes, so unknown paths still 404 and
+        # unsupported methods still 405. The SPA catch-all matches any
+        # path but never takes cross-origin requests, so it is left out.
+        if (request.method == 'OPTIONS' and request.url_rule is not None
+                and request.url_rule.endpoint != 'serve_react_static'):
+            return Response(status=204, headers=_CORS_PREFLIGHT_HEADERS)
     
-    # Configure logging
-    logging.basicConfig(level=logging.INFO)
-    app.logger.setLevel(logging.INFO)
+    @app.after_request
+    def cors_headers(response):
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        return response
+    
+    # Configure logging (written to stderr from a background thread)
+    configure_logging(app, logging.INFO)
     
     # Serve React app
+    index_path = os.path.join(app.static_folder, 'index.html')
+    
     @app.route('/')
     def serve_react_app():
         """Serve React app index.html"""
         try:
-            return send_from_directory(app.static_folder, 'index.html')
-        except Exception as e:
-            app.logger.error(f"Error serving index.html: {str(e)}")
-            return f"""
-            <!DOCTYPE html>
-            <html lang="es">
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>ESKLENCHEN - Inversión Inmobiliaria</title>
-                <style>
-                    body {{
-                        font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                        margin: 0;
-                        padding: 0;
-                        background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%);
-                        color: white;
-                        min-height: 100vh;
-                        display: flex;
-                        align-items: center;
-                        justify-content: center;
-                    }}
-                    .container {{
-                        text-align: center;
-                        max-width: 800px;
-                        padding: 40px 20px;
-                    }}
-                    .logo {{
-                        font-size: 3rem;
-                        font-weight: bold;
-                        margin-bottom: 20px;
-                        color: #ffd700;
-                    }}
-                    .tagline {{
-                        font-size: 1.5rem;
-                        margin-bottom: 30px;
-                        opacity: 0.9;
-                    }}
-                    .services {{
-                        display: grid;
-                        grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-                        gap: 20px;
-                        margin: 40px 0;
-                    }}
-                    .service {{
-                        background: rgba(255, 255, 255, 0.1);
-                        padding: 20px;
-                        border-radius: 10px;
-                        backdrop-filter: blur(10px);
-                    }}
-                    .contact {{
-                        margin-top: 40px;
-                        padding: 20px;
-                        background: rgba(255, 215, 0, 0.1);
-                        border-radius: 10px;
-                    }}
-                    .phone {{
-                        font-size: 1.5rem;
-                        font-weight: bold;
-                        color: #ffd700;
-                        margin: 10px 0;
-                    }}
-                    .badges {{
-                        display: flex;
-                        justify-content: center;
-                        gap: 20px;
-                        margin-top: 30px;
-                        flex-wrap: wrap;
-                    }}
-                    .badge {{
-                        background: rgba(255, 255, 255, 0.2);
-                        padding: 10px 15px;
-                        border-radius: 20px;
-                        font-size: 0.9rem;
-                    }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="logo">ESKLENCHEN</div>
-                    <div class="tagline">Inversión Inmobiliaria Inteligente</div>
-                    
-                    <div class="services">
-                        <div class="service">
-                            <h3>🏠 Reforma sin Coste</h3>
-                            <p>Reformamos tu propiedad sin inversión inicial. Recuperas la inversión con la venta.</p>
-                        </div>
-                        <div class="service">
-                            <h3>📊 Análisis con IA</h3>
-                            <p>Valoraciones automáticas con inteligencia artificial y análisis de mercado.</p>
-                        </div>
-                        <div class="service">
-                            <h3>💼 Gestión Integral</h3>
-                            <p>Nos encargamos de todo: compra, reforma, gestión y venta de propiedades.</p>
-                        </div>
-                        <div class="service">
-                            <h3>⭐ Experiencias Premium</h3>
-                            <p>Servicios de alta calidad para huéspedes y máxima rentabilidad.</p>
-                        </div>
-                    </div>
-                    
-                    <div class="contact">
-                        <h3>Contacta con Nosotros</h3>
-                        <div class="phone">📞 +34 624 737 299</div>
-                        <p>contact@esklenchen.com</p>
-                        <p>Especialistas en inversión inmobiliaria con más de 10 años de experiencia</p>
-                    </div>
-                    
-                    <div class="badges">
-                        <div class="badge">🔒 SSL Secure</div>
-                        <div class="badge">🛡️ GDPR Compliant</div>
-                        <div class="badge">💳 Secure Payment</div>
-                        <div class="badge">✅ Verified Business</div>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
+            data, etag = load_index(index_path)
+        except OSError as e:
+            app.logger.error("Error serving index.html: %s", e)
+            if request.accept_encodings['gzip']:
+                return Response(_FALLBACK_HTML_GZ, mimetype='text/html', headers={
+                    'Content-Encoding': 'gzip',
+                    'Vary': 'Accept-Encoding'
+                })
+            return Response(_FALLBACK_HTML, mimetype='text/html', headers={'Vary': 'Accept-Encoding'})
+        
+        response = Response(data, mimetype='text/html')
+        response.set_etag(etag)
+        return response.make_conditional(request)
     
-    @app.route('/<path:path>')
+    # No automatic OPTIONS, so a preflight for an unknown path fails
+    @app.route('/<path:path>', provide_automatic_options=False)
     def serve_react_static(path):
         """Serve React static files or fallback to index.html for SPA routing"""
-        try:
-            return send_from_directory(app.static_folder, path)
-        except:
-            # Fallback to index.html for SPA routing
-            return serve_react_app()
+        if path.startswith('api/'):
+            abort(404)
+        
+        full_path = safe_join(app.static_folder, path)
+        if full_path and os.path.isfile(full_path):
+            if path.startswith('assets/'):
+                # Build assets have content-hashed names, so browsers and CDNs
+                # can keep them forever instead of coming back to a worker
+                response = send_file(full_path, max_age=_ASSET_MAX_AGE)
+                response.cache_control.immutable = True
+                return response
+            return send_file(full_path)
+        
+        if path.startswith('assets/'):
+            # A stale or mistyped asset URL should 404, not get the SPA shell
+            abort(404)
+        
+        # Fallback to index.html for SPA routing
+        return serve_react_app()
     
     # Health check endpoint
-    @app.route('/api/health', methods=['GET'])
+    @app.route('/api/health', methods=('GET',), strict_slashes=False)
     def health_check():
         """Health check endpoint"""
-        return jsonify({
+        return ojsonify({
             'status': 'healthy',
             'service': 'ESKLENCHEN Enterprise Backend',
             'version': '3.0.0',
@@ -169,243 +316,167 @@ def create_app():
         })
     
     # Contact form endpoint
-    @app.route('/api/contact', methods=['POST'])
+    @app.route('/api/contact', methods=('POST',), strict_slashes=False)
     def contact_form():
         """Handle contact form submissions"""
+        data = decode(request.get_data(cache=False), PartialContactRequest)
         try:
-            data = request.get_json()
+            now = time.time()
             
             # Log contact submission
-            app.logger.info(f"Contact form submission: {data.get('email', 'unknown')}")
-            
-            contact_data = {
-                'name': data.get('name'),
-                'email': data.get('email'),
-                'phone': data.get('phone'),
-                'message': data.get('message'),
-                'form_type': data.get('form_type', 'general'),
-                'timestamp': datetime.utcnow().isoformat()
-            }
+            app.logger.info("Contact form submission: %s", data.email or 'unknown')
             
-            # Log the contact data
-            app.logger.info(f"Contact data received: {contact_data}")
+            # Log the full contact data only when debugging
+            if app.logger.isEnabledFor(logging.DEBUG):
+                contact_data = {
+                    'name': data.name,
+                    'email': data.email,
+                    'phone': data.phone,
+                    'message': data.message,
+                    'form_type': data.form_type,
+                    'timestamp': datetime.utcfromtimestamp(now).isoformat()
+                }
+                app.logger.debug("Contact data received: %s", contact_data)
             
-            return jsonify({
+            return ojsonify({
                 'success': True,
                 'message': 'Mensaje recibido correctamente. Te contactaremos pronto.',
-                'contact_id': f"ESKA{datetime.now().strftime('%Y%m%d%H%M%S')}"
+                'contact_id': _reference_id('ESKA', now)
             })
             
         except Exception as e:
-            app.logger.error(f"Error in contact form: {str(e)}")
-            return jsonify({
+            app.logger.error("Error in contact form: %s", e)
+            return ojsonify({
                 'success': False,
                 'error': 'Error procesando el formulario'
             }), 500
     
     # Property analysis endpoint
-    @app.route('/api/property-analysis', methods=['POST'])
+    @app.route('/api/property-analysis', methods=('POST',), strict_slashes=False)
     def property_analysis():
         """Handle property analysis requests"""
+        data = decode(request.get_data(cache=False), PropertyAnalysisRequest)
         try:
-            data = request.get_json()
+            now = time.time()
             
             # Log analysis request
-            app.logger.info(f"Property analysis request: {data.get('location', 'unknown')}")
+            app.logger.info("Property analysis request: %s", data.location)
             
             # Simulate AI analysis
-            surface = float(data.get('surface', 80))
-            rooms = int(data.get('rooms', 3))
-            location = data.get('location', 'Barcelona')
+            surface = data.surface
+            location = data.location
             
             # Simple valuation algorithm
-            base_price_per_m2 = {
-                'Barcelona': 4500,
-                'Madrid': 4200,
-                'Valencia': 2800,
-                'Sevilla': 2500,
-                'Bilbao': 3800,
-                'Badalona': 3200
-            }.get(location, 3000)
+            base_price_per_m2 = _PRICE_PER_M2.get(location, 3000)
             
-            estimated_value = surface * base_price_per_m2
-            renovation_cost = estimated_value * 0.15  # 15% for renovation
-            potential_value = estimated_value * 1.25  # 25% increase after renovation
-            roi_percentage = ((potential_value - estimated_value - renovation_cost) / (estimated_value + renovation_cost)) * 100
+            estimated_value, renovation_cost, potential_value = _estimate_property(surface, base_price_per_m2)
             
             analysis_result = {
-                'property_id': f"PROP{datetime.now().strftime('%Y%m%d%H%M%S')}",
+                'property_id': _reference_id('PROP', now),
                 'estimated_value': round(estimated_value),
                 'renovation_cost': round(renovation_cost),
                 'potential_value': round(potential_value),
-                'roi_percentage': round(roi_percentage, 2),
-                'confidence_level': 87.5,
-                'analysis_factors': {
-                    'location_score': 8.5,
-                    'market_trend': 'positive',
-                    'renovation_potential': 'high',
-                    'rental_yield': 6.2
-                },
-                'recommendations': [
-                    'Excelente oportunidad de inversión',
-                    'Ubicación con alta demanda',
-                    'Potencial de revalorización alto',
-                    'Reforma recomendada para maximizar ROI'
-                ],
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': datetime.utcfromtimestamp(now).isoformat()
             }
             
-            app.logger.info(f"Analysis completed: ROI {roi_percentage}%")
+            app.logger.info("Analysis completed: ROI %s%%", _ROI_PERCENTAGE)
             
-            return jsonify({
-                'success': True,
-                'analysis': analysis_result
-            })
+            # Only the per-request fields are encoded; the rest is spliced in
+            body = b''.join((
+                b'{"success":true,"analysis":',
+                dumps(analysis_result)[:-1],
+                b',',
+                _ANALYSIS_CONSTANT_FIELDS,
+                b'}}'
+            ))
+            return Response(body, mimetype='application/json')
             
         except Exception as e:
-            app.logger.error(f"Error in property analysis: {str(e)}")
-            return jsonify({
+            app.logger.error("Error in property analysis: %s", e)
+            return ojsonify({
                 'success': False,
                 'error': 'Error realizando análisis'
             }), 500
     
     # Renovation proposal endpoint
-    @app.route('/api/renovation-proposal', methods=['POST'])
+    @app.route('/api/renovation-proposal', methods=('POST',), strict_slashes=False)
     def renovation_proposal():
         """Handle renovation proposal requests"""
+        data = decode(request.get_data(cache=False), RenovationProposalRequest)
         try:
-            data = request.get_json()
+            now = time.time()
             
             # Log proposal request
-            app.logger.info(f"Renovation proposal request: {data.get('property_type', 'unknown')}")
+            app.logger.info("Renovation proposal request: %s", data.property_type)
             
-            property_type = data.get('property_type', 'apartment')
-            budget = float(data.get('budget', 50000))
+            property_type = data.property_type
+            budget = data.budget
             
             # Generate renovation proposal
             proposal = {
-                'proposal_id': f"RENOV{datetime.now().strftime('%Y%m%d%H%M%S')}",
+                'proposal_id': _reference_id('RENOV', now),
                 'property_type': property_type,
                 'estimated_budget': budget,
                 'timeline_weeks': 8,
                 'renovation_areas': [
-                    {'area': 'Cocina', 'cost': budget * 0.3, 'priority': 'high'},
-                    {'area': 'Baños', 'cost': budget * 0.25, 'priority': 'high'},
-                    {'area': 'Suelos', 'cost': budget * 0.2, 'priority': 'medium'},
-                    {'area': 'Pintura', 'cost': budget * 0.15, 'priority': 'medium'},
-                    {'area': 'Instalaciones', 'cost': budget * 0.1, 'priority': 'low'}
+                    {'area': area, 'cost': budget * share, 'priority': priority}
+                    for area, share, priority in _RENOVATION_AREAS
                 ],
                 'expected_roi': 25.5,
-                'financing_options': {
-                    'reforma_sin_coste': True,
-                    'payment_on_sale': True,
-                    'guaranteed_roi': True
-                },
-                'next_steps': [
-                    'Visita técnica gratuita',
-                    'Presupuesto detallado',
-                    'Planificación de obra',
-                    'Inicio de reforma'
-                ],
-                'timestamp': datetime.utcnow().isoformat()
+                'financing_options': _FINANCING_OPTIONS,
+                'next_steps': _NEXT_STEPS,
+                'timestamp': datetime.utcfromtimestamp(now).isoformat()
             }
             
-            return jsonify({
+            return ojsonify({
                 'success': True,
                 'proposal': proposal
             })
             
         except Exception as e:
-            app.logger.error(f"Error in renovation proposal: {str(e)}")
-            return jsonify({
+            app.logger.error("Error in renovation proposal: %s", e)
+            return ojsonify({
                 'success': False,
                 'error': 'Error generando propuesta'
             }), 500
     
     # Legal pages endpoints
-    @app.route('/api/legal/privacy', methods=['GET'])
+    @app.route('/api/legal/privacy', methods=('GET',), strict_slashes=False)
     def privacy_policy():
         """Get privacy policy content"""
-        privacy_content = """
-        <h1>Política de Privacidad - ESKLENCHEN</h1>
-        
-        <h2>1. Responsable del Tratamiento</h2>
-        <p>ESKLENCHEN Real Estate Solutions es responsable del tratamiento de sus datos personales.</p>
-        
-        <h2>2. Datos que Recopilamos</h2>
-        <p>Recopilamos los siguientes tipos de datos:</p>
-        <ul>
-            <li>Datos de contacto (nombre, email, teléfono)</li>
-            <li>Información de inversión y preferencias</li>
-            <li>Datos de navegación y cookies</li>
-        </ul>
-        
-        <h2>3. Finalidad del Tratamiento</h2>
-        <p>Utilizamos sus datos para:</p>
-        <ul>
-            <li>Proporcionar nuestros servicios de inversión inmobiliaria</li>
-            <li>Comunicarnos con usted sobre oportunidades de inversión</li>
-            <li>Cumplir con obligaciones legales</li>
-        </ul>
-        
-        <h2>4. Base Legal</h2>
-        <p>El tratamiento se basa en su consentimiento y en la ejecución de contratos.</p>
-        
-        <h2>5. Derechos del Usuario</h2>
-        <p>Tiene derecho a acceder, rectificar, suprimir y portar sus datos.</p>
-        
-        <h2>6. Contacto</h2>
-        <p>Para ejercer sus derechos, contacte: contact@esklenchen.com</p>
-        """
-        
-        return jsonify({
-            'success': True,
-            'content': privacy_content
-        })
+        return privacy_response()
     
-    @app.route('/api/legal/cookies', methods=['GET'])
+    @app.route('/api/legal/cookies', methods=('GET',), strict_slashes=False)
     def cookies_policy():
         """Get cookies policy content"""
-        cookies_content = """
-        <h1>Política de Cookies - ESKLENCHEN</h1>
-        
-        <h2>¿Qué son las cookies?</h2>
-        <p>Las cookies son pequeños archivos de texto que se almacenan en su dispositivo cuando visita nuestro sitio web.</p>
-        
-        <h2>Tipos de cookies que utilizamos</h2>
-        <ul>
-            <li><strong>Cookies técnicas:</strong> Necesarias para el funcionamiento del sitio</li>
-            <li><strong>Cookies analíticas:</strong> Para analizar el uso del sitio web</li>
-            <li><strong>Cookies de personalización:</strong> Para recordar sus preferencias</li>
-        </ul>
-        
-        <h2>Gestión de cookies</h2>
-        <p>Puede gestionar las cookies desde la configuración de su navegador.</p>
-        
-        <h2>Cookies de terceros</h2>
-        <p>Utilizamos Google Analytics para analizar el tráfico del sitio web.</p>
-        """
-        
-        return jsonify({
-            'success': True,
-            'content': cookies_content
-        })
+        return cookies_response()
     
     # Error handlers
     @app.errorhandler(404)
     def not_found(error):
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': 'Endpoint not found'
         }), 404
     
+    @app.errorhandler(msgspec.DecodeError)
+    def invalid_body(error):
+        # Raised for malformed JSON as well as fields of the wrong type
+        return ojsonify({
+            'success': False,
+            'error': f'Invalid request body: {error}'
+        }), 400
+    
     @app.errorhandler(500)
     def internal_error(error):
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': 'Internal server error'
         }), 500
     
+    # Compile the URL map now rather than on the first request
+    app.url_map.update()
+    
     return app
 
 # Create app instance
@@ -1,9 +1,19 @@
-from flask import Flask, jsonify, request, send_file, send_from_directory
+from flask import Flask, Response, abort, jsonify, request, send_file
+from werkzeug.utils import safe_join
+import msgspec
 from flask_cors import CORS
-from flask_sqlalchemy import SQLAlchemy
-import os
-from datetime import datetime
+from sqlalchemy import case, func
+from sqlalchemy.orm import raiseload
+from sqlalchemy.pool import NullPool
+import contextlib
+import gzip
+import hashlib
+import itertools
 import logging
+import os
+import threading
+import time
+from datetime import date, datetime
 
 # Import route blueprints
 from src.routes.projects import projects_bp
@@ -12,40 +22,196 @@ from src.routes.ai_valuation import ai_valuation_bp
 from src.routes.auth import auth_bp
 
 # Import models to ensure tables are created
-from src.models.project import db as project_db
-from src.models.client import db as client_db
-from src.models.ai_valuation import db as valuation_db
+from src.extensions import db
+from src.models.project import Project
+from src.models.client import Client
+from src.models.ai_valuation import PropertyValuation
 
 # Import services
+from src.legal import cookies_response, privacy_response
+from src.logging_config import configure_logging
+from src.schemas import ContactRequest, decode
+from src.serialization import JSONProvider, dumps
+from src.static_files import load_index
 from src.services.pdf_generator import ESKLENCHENPDFGenerator
 
+# One year, the conventional lifetime for fingerprinted static assets
+_ASSET_MAX_AGE = 365 * 24 * 60 * 60
+
+# The generator only holds read-only colours and styles, so one instance is
+# safely shared by all request threads
+_PDF_GENERATOR = ESKLENCHENPDFGenerator()
+_REPORT_COUNTER = itertools.count()
+
+
+def _report_suffix():
+    """Return a unique suffix (ms timestamp, pid, counter) for report files
+
+    Reports are rendered to a uniquely named temporary file and then moved
+    into place, so concurrent requests never see a half-written PDF.
+    """
+    return f"{time.time_ns() // 1_000_000}_{os.getpid()}_{next(_REPORT_COUNTER)}"
+
+
+def _report_digest(*report_data):
+    """Return a short content hash of the data a report is rendered from
+
+    Today's date is part of the hash, so a report is only reused on the
+    day it was generated and its footer shows the time it was rendered.
+    """
+    return hashlib.sha1(dumps((date.today().isoformat(),) + report_data)).hexdigest()[:20]
+
+
+# Reports are keyed by day, so older files are never served again
+_REPORT_MAX_AGE = 2 * 24 * 60 * 60
+
+
+def _render_report(output_path, render):
+    """Render a report into place at output_path via a temporary file
+
+    render(path) writes the PDF and returns (success, message), like the
+    generator methods. The temporary file is removed unless the render
+    succeeds, and reports older than _REPORT_MAX_AGE are evicted.
+    Returns (success, message).
+    """
+    _evict_old_reports(os.path.dirname(output_path))
+    tmp_path = f"{output_path}.{_report_suffix()}.tmp"
+    success = False
+    try:
+        success, message = render(tmp_path)
+        if success:
+            os.replace(tmp_path, output_path)
+        return success, message
+    finally:
+        if not success:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_path)
+
+
+def _evict_old_reports(reports_dir):
+    """Delete reports and leftover temporary files older than _REPORT_MAX_AGE"""
+    cutoff = time.time() - _REPORT_MAX_AGE
+    with os.scandir(reports_dir) as entries:
+        for entry in entries:
+            # Another worker may be evicting the same file
+            with contextlib.suppress(OSError):
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+
+
+# Dashboards poll this endpoint from every open tab, so the stats are
+# recomputed at most once per _STATS_TTL seconds per worker
+_STATS_TTL = 15
+_STATS_CACHE = {'entry': (0.0, b'', b'')}
+_STATS_LOCK = threading.Lock()
+
+
+def _compute_dashboard_stats():
+    """Query the dashboard statistics payload"""
+    # Projects and financial stats (one aggregate query per table)
+    (total_projects, active_projects, completed_projects,
+     total_investment, total_revenue) = Project.query.with_entities(
+        func.count(Project.id),
+        func.count(case((Project.status == 'active', 1))),
+        func.count(case((Project.status == 'completed', 1))),
+        func.coalesce(func.sum(Project.total_investment), 0),
+        func.coalesce(func.sum(Project.actual_revenue), 0)
+    ).one()
+    
+    # Clients stats
+    total_clients, active_clients = Client.query.with_entities(
+        func.count(Client.id),
+        func.count(case((Client.status == 'active', 1)))
+    ).one()
+    
+    # Valuations stats
+    total_valuations, recent_valuations = PropertyValuation.query.with_entities(
+        func.count(PropertyValuation.id),
+        func.count(case((PropertyValuation.status == 'completed', 1)))
+    ).one()
+    
+    # Recent activity. to_dict() only reads columns, so any relationship
+    # access during serialization would be an accidental N+1 - fail loudly
+    recent_projects = Project.query.options(raiseload('*')).order_by(Project.created_at.desc()).limit(5).all()
+    recent_clients = Client.query.options(raiseload('*')).order_by(Client.created_at.desc()).limit(5).all()
+    recent_vals = PropertyValuation.query.options(raiseload('*')).order_by(PropertyValuation.created_at.desc()).limit(5).all()
+    
+    return {
+        'success': True,
+        'stats': {
+            'projects': {
+                'total': total_projects,
+                'active': active_projects,
+                'completed': completed_projects
+            },
+            'clients': {
+                'total': total_clients,
+                'active': active_clients
+            },
+            'valuations': {
+                'total': total_valuations,
+                'completed': recent_valuations
+            },
+            'financial': {
+                'total_investment': total_investment,
+                'total_revenue': total_revenue,
+                'total_profit': total_revenue - total_investment
+            }
+        },
+        'recent_activity': {
+            'projects': [project.to_dict() for project in recent_projects],
+            'clients': Client.serialize_many(recent_clients),
+            'valuations': [val.to_dict() for val in recent_vals]
+        }
+    }
+
+
 def create_app():
     """Create and configure Flask application"""
-    app = Flask(__name__, static_folder='static', static_url_path='')
+    # Flask's own static route lives under /static so it doesn't shadow the
+    # SPA catch-all below, which serves the build from the site root
+    app = Flask(__name__, static_folder='static', static_url_path='/static')
+    app.json = JSONProvider(app)
     
     # Configuration
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'esklenchen-secret-key-2025')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///esklenchen.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_pre_ping': True,
+        'pool_recycle': 1800
+    }
+    if os.environ.get('DB_EXTERNAL_POOL'):
+        # Behind a transaction-mode pooler such as pgbouncer, which shares
+        # a few server connections between all workers; idle connections
+        # held open in every worker would defeat it
+        app.config['SQLALCHEMY_ENGINE_OPTIONS']['poolclass'] = NullPool
+    elif not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite:'):
+        # Sized per worker process, so keep workers * (size + overflow)
+        # below the database server's connection limit
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'].update(
+            pool_size=int(os.environ.get('DB_POOL_SIZE', 10)),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 20))
+        )
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    app.config['REPORTS_DIR'] = os.path.join(os.getcwd(), 'reports')
+    
+    # Create the reports directory once rather than on every PDF request
+    os.makedirs(app.config['REPORTS_DIR'], exist_ok=True)
     
     # Enable CORS for all routes
     CORS(app, origins="*", allow_headers=["Content-Type", "Authorization"])
     
     # Initialize database
-    project_db.init_app(app)
-    client_db.init_app(app)
-    valuation_db.init_app(app)
+    db.init_app(app)
     
-    # Configure logging
-    logging.basicConfig(level=logging.INFO)
-    app.logger.setLevel(logging.INFO)
+    # Configure logging (written to stderr from a background thread).
+    # Production runs at WARNING; set LOG_LEVEL=INFO for request logging.
+    configure_logging(app, os.environ.get('LOG_LEVEL', 'WARNING').upper())
     
     # Create tables
     with app.app_context():
-        project_db.create_all()
-        client_db.create_all()
-        valuation_db.create_all()
+        db.create_all()
     
     # Register blueprints
     app.register_blueprint(projects_bp, url_prefix='/api')
@@ -54,19 +220,43 @@ def create_app():
     app.register_blueprint(auth_bp, url_prefix='/api')
     
     # Serve React app
+    index_path = os.path.join(app.static_folder, 'index.html')
+    
     @app.route('/')
     def serve_react_app():
         """Serve React app index.html"""
-        return send_from_directory(app.static_folder, 'index.html')
+        try:
+            data, etag = load_index(index_path)
+        except OSError:
+            abort(404)
+        
+        response = Response(data, mimetype='text/html')
+        response.set_etag(etag)
+        return response.make_conditional(request)
     
     @app.route('/<path:path>')
     def serve_react_static(path):
         """Serve React static files or fallback to index.html for SPA routing"""
-        try:
-            return send_from_directory(app.static_folder, path)
-        except:
-            # Fallback to index.html for SPA routing
-            return send_from_directory(app.static_folder, 'index.html')
+        if path.startswith('api/'):
+            # Unknown API URLs get the JSON 404 rather than index.html
+            abort(404)
+        
+        full_path = safe_join(app.static_folder, path)
+        if full_path and os.path.isfile(full_path):
+            if path.startswith('assets/'):
+                # Build assets have content-hashed names, so browsers and CDNs
+                # can keep them forever instead of coming back to a worker
+                response = send_file(full_path, max_age=_ASSET_MAX_AGE)
+                response.cache_control.immutable = True
+                return response
+            return send_file(full_path)
+        
+        if path.startswith('assets/'):
+            # A stale or mistyped asset URL should 404, not get the SPA shell
+            abort(404)
+        
+        # Fallback to index.html for SPA routing
+        return serve_react_app()
     
     # Health check endpoint
     @app.route('/api/health', methods=['GET'])
@@ -91,21 +281,22 @@ def create_app():
     @app.route('/api/contact', methods=['POST'])
     def contact_form():
         """Handle contact form submissions"""
+        data = decode(request.get_data(cache=False), ContactRequest)
         try:
-            data = request.get_json()
-            
             # Log contact submission
-            app.logger.info(f"Contact form submission: {data.get('email', 'unknown')}")
+            app.logger.info("Contact form submission: %s", data.email)
             
             # In production, you might want to save to database or send email
-            contact_data = {
-                'name': data.get('name'),
-                'email': data.get('email'),
-                'phone': data.get('phone'),
-                'message': data.get('message'),
-                'form_type': data.get('form_type', 'general'),
-                'timestamp': datetime.utcnow().isoformat()
-            }
+            if app.logger.isEnabledFor(logging.DEBUG):
+                contact_data = {
+                    'name': data.name,
+                    'email': data.email,
+                    'phone': data.phone,
+                    'message': data.message,
+                    'form_type': data.form_type,
+                    'timestamp': datetime.utcnow().isoformat()
+                }
+                app.logger.debug("Contact data received: %s", contact_data)
             
             return jsonify({
                 'success': True,
@@ -114,7 +305,7 @@ def create_app():
             })
             
         except Exception as e:
-            app.logger.error(f"Error in contact form: {str(e)}")
+            app.logger.error("Error in contact form: %s", e)
             return jsonify({
                 'success': False,
                 'error': 'Error procesando el formulario'
@@ -125,39 +316,37 @@ def create_app():
     def generate_valuation_pdf(valuation_id):
         """Generate PDF for property valuation"""
         try:
-            from src.models.ai_valuation import PropertyValuation
-            
             valuation = PropertyValuation.query.get_or_404(valuation_id)
             
-            # Create reports directory if it doesn't exist
-            reports_dir = os.path.join(os.getcwd(), 'reports')
-            os.makedirs(reports_dir, exist_ok=True)
+            reports_dir = app.config['REPORTS_DIR']
             
-            # Generate PDF
-            pdf_generator = ESKLENCHENPDFGenerator()
-            filename = f"valoracion_{valuation_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            valuation_data = valuation.to_dict()
+            digest = _report_digest(valuation_data)
+            filename = f"valoracion_{valuation_id}_{digest}.pdf"
             output_path = os.path.join(reports_dir, filename)
             
-            success, message = pdf_generator.generate_property_valuation_report(
-                valuation.to_dict(), 
-                output_path
-            )
-            
-            if success:
-                return send_file(
+            # Identical data renders an identical report, so reuse one if present
+            if not os.path.isfile(output_path):
+                success, message = _render_report(
                     output_path,
-                    as_attachment=True,
-                    download_name=filename,
-                    mimetype='application/pdf'
+                    lambda path: _PDF_GENERATOR.generate_property_valuation_report(valuation_data, path)
                 )
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': message
-                }), 500
+                if not success:
+                    return jsonify({
+                        'success': False,
+                        'error': message
+                    }), 500
+            
+            return send_file(
+                output_path,
+                as_attachment=True,
+                download_name=filename,
+                mimetype='application/pdf',
+                etag=digest
+            )
                 
         except Exception as e:
-            app.logger.error(f"Error generating valuation PDF: {str(e)}")
+            app.logger.error("Error generating valuation PDF: %s", e)
             return jsonify({
                 'success': False,
                 'error': 'Error generando PDF'
@@ -167,42 +356,39 @@ def create_app():
     def generate_portfolio_pdf(client_id):
         """Generate PDF for client portfolio"""
         try:
-            from src.models.client import Client
-            from src.models.project import Project
+            client = Client.query_with_relations('projects').get_or_404(client_id)
+            projects = client.projects
             
-            client = Client.query.get_or_404(client_id)
-            projects = Project.query.filter_by(client_id=client_id).all()
+            reports_dir = app.config['REPORTS_DIR']
             
-            # Create reports directory if it doesn't exist
-            reports_dir = os.path.join(os.getcwd(), 'reports')
-            os.makedirs(reports_dir, exist_ok=True)
-            
-            # Generate PDF
-            pdf_generator = ESKLENCHENPDFGenerator()
-            filename = f"portfolio_{client_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            client_data = client.to_dict(include_sensitive=True)
+            projects_data = [project.to_dict() for project in projects]
+            digest = _report_digest(client_data, projects_data)
+            filename = f"portfolio_{client_id}_{digest}.pdf"
             output_path = os.path.join(reports_dir, filename)
             
-            success, message = pdf_generator.generate_client_portfolio_report(
-                client.to_dict(include_sensitive=True),
-                [project.to_dict() for project in projects],
-                output_path
-            )
-            
-            if success:
-                return send_file(
+            # Identical data renders an identical report, so reuse one if present
+            if not os.path.isfile(output_path):
+                success, message = _render_report(
                     output_path,
-                    as_attachment=True,
-                    download_name=filename,
-                    mimetype='application/pdf'
+                    lambda path: _PDF_GENERATOR.generate_client_portfolio_report(client_data, projects_data, path)
                 )
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': message
-                }), 500
+                if not success:
+                    return jsonify({
+                        'success': False,
+                        'error': message
+                    }), 500
+            
+            return send_file(
+                output_path,
+                as_attachment=True,
+                download_name=filename,
+                mimetype='application/pdf',
+                etag=digest
+            )
                 
         except Exception as e:
-            app.logger.error(f"Error generating portfolio PDF: {str(e)}")
+            app.logger.error("Error generating portfolio PDF: %s", e)
             return jsonify({
                 'success': False,
                 'error': 'Error generando PDF de portfolio'
@@ -213,63 +399,26 @@ def create_app():
     def dashboard_stats():
         """Get dashboard statistics"""
         try:
-            from src.models.project import Project
-            from src.models.client import Client
-            from src.models.ai_valuation import PropertyValuation
+            expires, body, body_gz = _STATS_CACHE['entry']
+            if time.monotonic() >= expires:
+                with _STATS_LOCK:
+                    # Another thread may have refreshed it while we waited
+                    expires, body, body_gz = _STATS_CACHE['entry']
+                    if time.monotonic() >= expires:
+                        # Encode and compress once per refresh, not per poll
+                        body = app.json.dumps(_compute_dashboard_stats()).encode('utf-8')
+                        body_gz = gzip.compress(body, 6)
+                        _STATS_CACHE['entry'] = (time.monotonic() + _STATS_TTL, body, body_gz)
             
-            # Projects stats
-            total_projects = Project.query.count()
-            active_projects = Project.query.filter_by(status='active').count()
-            completed_projects = Project.query.filter_by(status='completed').count()
-            
-            # Clients stats
-            total_clients = Client.query.count()
-            active_clients = Client.query.filter_by(status='active').count()
-            
-            # Valuations stats
-            total_valuations = PropertyValuation.query.count()
-            recent_valuations = PropertyValuation.query.filter_by(status='completed').count()
-            
-            # Financial stats
-            total_investment = project_db.session.query(project_db.func.sum(Project.total_investment)).scalar() or 0
-            total_revenue = project_db.session.query(project_db.func.sum(Project.actual_revenue)).scalar() or 0
-            
-            # Recent activity
-            recent_projects = Project.query.order_by(Project.created_at.desc()).limit(5).all()
-            recent_clients = Client.query.order_by(Client.created_at.desc()).limit(5).all()
-            recent_vals = PropertyValuation.query.order_by(PropertyValuation.created_at.desc()).limit(5).all()
-            
-            return jsonify({
-                'success': True,
-                'stats': {
-                    'projects': {
-                        'total': total_projects,
-                        'active': active_projects,
-                        'completed': completed_projects
-                    },
-                    'clients': {
-                        'total': total_clients,
-                        'active': active_clients
-                    },
-                    'valuations': {
-                        'total': total_valuations,
-                        'completed': recent_valuations
-                    },
-                    'financial': {
-                        'total_investment': total_investment,
-                        'total_revenue': total_revenue,
-                        'total_profit': total_revenue - total_investment
-                    }
-                },
-                'recent_activity': {
-                    'projects': [project.to_dict() for project in recent_projects],
-                    'clients': [client.to_dict() for client in recent_clients],
-                    'valuations': [val.to_dict() for val in recent_vals]
-                }
-            })
+            if request.accept_encodings['gzip']:
+                return Response(body_gz, mimetype='application/json', headers={
+                    'Content-Encoding': 'gzip',
+                    'Vary': 'Accept-Encoding'
+                })
+            return Response(body, mimetype='application/json', headers={'Vary': 'Accept-Encoding'})
             
         except Exception as e:
-            app.logger.error(f"Error getting dashboard stats: {str(e)}")
+            app.logger.error("Error getting dashboard stats: %s", e)
             return jsonify({
                 'success': False,
                 'error': 'Error obteniendo estadísticas'
@@ -279,70 +428,12 @@ def create_app():
     @app.route('/api/legal/privacy', methods=['GET'])
     def privacy_policy():
         """Get privacy policy content"""
-        privacy_content = """
-        <h1>Política de Privacidad - ESKLENCHEN</h1>
-        
-        <h2>1. Responsable del Tratamiento</h2>
-        <p>ESKLENCHEN Real Estate Solutions es responsable del tratamiento de sus datos personales.</p>
-        
-        <h2>2. Datos que Recopilamos</h2>
-        <p>Recopilamos los siguientes tipos de datos:</p>
-        <ul>
-            <li>Datos de contacto (nombre, email, teléfono)</li>
-            <li>Información de inversión y preferencias</li>
-            <li>Datos de navegación y cookies</li>
-        </ul>
-        
-        <h2>3. Finalidad del Tratamiento</h2>
-        <p>Utilizamos sus datos para:</p>
-        <ul>
-            <li>Proporcionar nuestros servicios de inversión inmobiliaria</li>
-            <li>Comunicarnos con usted sobre oportunidades de inversión</li>
-            <li>Cumplir con obligaciones legales</li>
-        </ul>
-        
-        <h2>4. Base Legal</h2>
-        <p>El tratamiento se basa en su consentimiento y en la ejecución de contratos.</p>
-        
-        <h2>5. Derechos del Usuario</h2>
-        <p>Tiene derecho a acceder, rectificar, suprimir y portar sus datos.</p>
-        
-        <h2>6. Contacto</h2>
-        <p>Para ejercer sus derechos, contacte: contact@esklenchen.com</p>
-        """
-        
-        return jsonify({
-            'success': True,
-            'content': privacy_content
-        })
+        return privacy_response()
     
     @app.route('/api/legal/cookies', methods=['GET'])
     def cookies_policy():
         """Get cookies policy content"""
-        cookies_content = """
-        <h1>Política de Cookies - ESKLENCHEN</h1>
-        
-        <h2>¿Qué son las cookies?</h2>
-        <p>Las cookies son pequeños archivos de texto que se almacenan en su dispositivo cuando visita nuestro sitio web.</p>
-        
-        <h2>Tipos de cookies que utilizamos</h2>
-        <ul>
-            <li><strong>Cookies técnicas:</strong> Necesarias para el funcionamiento del sitio</li>
-            <li><strong>Cookies analíticas:</strong> Para analizar el uso del sitio web</li>
-            <li><strong>Cookies de personalización:</strong> Para recordar sus preferencias</li>
-        </ul>
-        
-        <h2>Gestión de cookies</h2>
-        <p>Puede gestionar las cookies desde la configuración de su navegador.</p>
-        
-        <h2>Cookies de terceros</h2>
-        <p>Utilizamos Google Analytics para analizar el tráfico del sitio web.</p>
-        """
-        
-        return jsonify({
-            'success': True,
-            'content': cookies_content
-        })
+        return cookies_response()
     
     # Error handlers
     @app.errorhandler(404)
@@ -352,6 +443,14 @@ def create_app():
             'error': 'Endpoint not found'
         }), 404
     
+    @app.errorhandler(msgspec.DecodeError)
+    def invalid_body(error):
+        # Raised for malformed JSON as well as missing or mistyped fields
+        return jsonify({
+            'success': False,
+            'error': f'Invalid request body: {error}'
+        }), 400
+    
     @app.errorhandler(500)
     def internal_error(error):
         return jsonify({
@@ -1,13 +1,129 @@
-from flask_sqlalchemy import SQLAlchemy
+from bisect import bisect_left
 from datetime import datetime
-import json
 import random
 import math
+import re
+import time
 
-db = SQLAlchemy()
+from src.extensions import db, trigram_index
+from src.models.json_lists import JSONListMixin
+from src.serialization import loads
 
-class PropertyValuation(db.Model):
+# Compound property appreciation over the projection horizons, assuming 4%
+# a year. Constant, so computed once rather than per valuation.
+_ANNUAL_APPRECIATION = 0.04
+_APPRECIATION_3YEAR = (1 + _ANNUAL_APPRECIATION) ** 3 - 1
+_APPRECIATION_5YEAR = (1 + _ANNUAL_APPRECIATION) ** 5 - 1
+
+# Base price per m² by city
+_LOCATION_PRICES = {
+    'barcelona': 4500,
+    'badalona': 3200,
+    'sant adrià': 3000,
+    'montgat': 3800,
+    'el masnou': 4000,
+    'premià de mar': 3500,
+    'vilassar de mar': 3600,
+    'mataró': 2800,
+    'calella': 2500,
+    'sitges': 5500,
+    'castelldefels': 4200,
+    'gavà': 3400
+}
+_LOCATION_RANK = {city: rank for rank, city in enumerate(_LOCATION_PRICES)}
+# Zero-width lookahead so overlapping city names are all reported
+_LOCATION_RE = re.compile('(?=(%s))' % '|'.join(map(re.escape, _LOCATION_PRICES)))
+
+# Rental markets above the 0.6% monthly base rate
+_PRIME_RENTAL_RE = re.compile('barcelona|sitges')
+_STRONG_RENTAL_RE = re.compile('badalona|maresme')
+
+# Studios rent at a premium, villas at a discount relative to their value
+_RENTAL_TYPE_ADJUSTMENTS = {
+    'estudio': 1.1,
+    'villa': 0.9
+}
+
+# Locations with enough comparables to raise valuation confidence
+_KNOWN_LOCATION_RE = re.compile('barcelona|badalona|sitges|mataró|calella')
+
+# Investment potential by 1-year ROI (%), checked in order: (exceeds, rating, message)
+_INVESTMENT_TIERS = (
+    (8, 'excellent', "Excelente oportunidad de inversión con alta rentabilidad"),
+    (6, 'good', "Buena oportunidad de inversión"),
+    (4, 'fair', "Inversión moderada, considerar otros factores"),
+    (None, 'poor', "Rentabilidad baja, evaluar cuidadosamente")
+)
+
+# Recommendations added when their predicate holds for a valuation
+_RECOMMENDATION_RULES = (
+    (lambda v: v.renovation_needed,
+     "Considerar programa 'Reforma sin Coste' de ESKLENCHEN"),
+    (lambda v: v.distance_to_beach and v.distance_to_beach <= 1,
+     "Proximidad a la playa aumenta potencial turístico"),
+    (lambda v: v.property_type == 'estudio' and 'barcelona' in v.location.lower(),
+     "Estudios en Barcelona tienen alta demanda de alquiler"),
+    (lambda v: v.rental_yield_percentage > 7,
+     "Excelente potencial de alquiler turístico")
+)
+
+# Price multiplier by surface: up to 40 m², up to 70 m², ... and above 150 m².
+# Small properties have a premium per m², large ones a discount.
+_SIZE_BREAKPOINTS = (40, 70, 100, 150)
+_SIZE_MULTIPLIERS = (1.1, 1.0, 0.98, 0.95, 0.92)
+
+_CONDITION_MULTIPLIERS = {
+    'excellent': 1.15,
+    'good': 1.0,
+    'fair': 0.85,
+    'poor': 0.70
+}
+
+# Month and year only drive seasonal demand and property age, so one clock
+# read per minute is shared by every valuation made in that minute
+_CALENDAR_TTL = 60
+_CALENDAR_CACHE = {'expires': 0.0, 'month_year': (1, 1970)}
+
+
+def _current_month_year():
+    """Return the current (month, year), re-reading the clock at most once a minute"""
+    now = time.monotonic()
+    if now >= _CALENDAR_CACHE['expires']:
+        today = datetime.now()
+        _CALENDAR_CACHE['month_year'] = (today.month, today.year)
+        _CALENDAR_CACHE['expires'] = now + _CALENDAR_TTL
+    return _CALENDAR_CACHE['month_year']
+
+
+# Columns serialized by PropertyValuation.to_dict()
+_DICT_COLUMNS = (
+    'id', 'location', 'property_type', 'surface', 'rooms', 'bathrooms', 'floor',
+    'year_built', 'neighborhood', 'distance_to_beach', 'distance_to_center',
+    'transport_score', 'amenities_score', 'condition', 'renovation_needed',
+    'estimated_renovation_cost', 'current_market_price', 'ai_estimated_value',
+    'price_per_sqm', 'rental_potential_monthly', 'rental_yield_percentage',
+    'ai_confidence_score', 'investment_potential', 'expected_roi_1year',
+    'expected_roi_3year', 'expected_roi_5year', 'risk_level', 'risk_factors',
+    'market_trend', 'competition_level', 'ai_recommendations', 'requester_name',
+    'requester_email', 'status', 'processing_time_seconds', 'created_at',
+    'completed_at'
+)
+
+
+class PropertyValuation(JSONListMixin, db.Model):
     __tablename__ = 'property_valuations'
+    __table_args__ = (
+        # Status counts / filtered listings and newest-first listings
+        db.Index('ix_property_valuations_status_created_at', 'status', 'created_at'),
+        db.Index('ix_property_valuations_created_at', 'created_at'),
+        # Per-location listings, newest first
+        db.Index('ix_property_valuations_location_created_at', 'location', 'created_at'),
+        # /valuations filtered by property type or requester, newest first
+        db.Index('ix_property_valuations_property_type_created_at', 'property_type', 'created_at'),
+        db.Index('ix_property_valuations_requester_email_created_at', 'requester_email', 'created_at'),
+        # Substring location filters
+        trigram_index('ix_property_valuations_location_trgm', 'location'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -41,7 +157,8 @@ class PropertyValuation(db.Model):
     # AI Analysis Results
     ai_estimated_value = db.Column(db.Float)
     ai_confidence_score = db.Column(db.Float)  # 0-100
-    ai_analysis_factors = db.Column(db.Text)  # JSON
+    # Not part of to_dict(); loaded only when accessed
+    ai_analysis_factors = db.deferred(db.Column(db.Text))  # JSON
     ai_recommendations = db.Column(db.Text)  # JSON
     
     # Investment Analysis
@@ -56,7 +173,7 @@ class PropertyValuation(db.Model):
     
     # Market Trends
     market_trend = db.Column(db.String(20))  # rising, stable, declining
-    seasonal_demand = db.Column(db.Text)  # JSON
+    seasonal_demand = db.deferred(db.Column(db.Text))  # JSON, deferred as above
     competition_level = db.Column(db.String(20))  # low, medium, high
     
     # Request Information
@@ -74,6 +191,9 @@ class PropertyValuation(db.Model):
     completed_at = db.Column(db.DateTime)
     
     def __init__(self, **kwargs):
+        # Only runs for new valuations; rows loaded from the database are
+        # rebuilt by SQLAlchemy without calling __init__, so stored results
+        # are never recomputed on read
         super(PropertyValuation, self).__init__(**kwargs)
         self.calculate_ai_valuation()
     
@@ -93,11 +213,8 @@ class PropertyValuation(db.Model):
             self.ai_estimated_value = base_price * size_multiplier * condition_multiplier * location_multiplier * market_multiplier
             self.price_per_sqm = self.ai_estimated_value / self.surface if self.surface > 0 else 0
             
-            # Calculate rental potential
-            self._calculate_rental_potential()
-            
-            # Calculate ROI projections
-            self._calculate_roi_projections()
+            # Calculate rental potential and ROI projections
+            self._calculate_financials()
             
             # Assess risk factors
             self._assess_risk_factors()
@@ -117,51 +234,26 @@ class PropertyValuation(db.Model):
     
     def _get_base_price_by_location(self):
         """Get base price per m² by location"""
-        location_prices = {
-            'barcelona': 4500,
-            'badalona': 3200,
-            'sant adrià': 3000,
-            'montgat': 3800,
-            'el masnou': 4000,
-            'premià de mar': 3500,
-            'vilassar de mar': 3600,
-            'mataró': 2800,
-            'calella': 2500,
-            'sitges': 5500,
-            'castelldefels': 4200,
-            'gavà': 3400
-        }
-        
         location_lower = self.location.lower()
-        for city, price in location_prices.items():
-            if city in location_lower:
-                return price * self.surface
-        
-        # Default price for unknown locations
-        return 3500 * self.surface
+        price = _LOCATION_PRICES.get(location_lower)
+        if price is None:
+            # A location can mention several cities; the earliest in
+            # _LOCATION_PRICES wins, whatever its position in the string
+            matches = _LOCATION_RE.findall(location_lower)
+            if matches:
+                price = _LOCATION_PRICES[min(matches, key=_LOCATION_RANK.get)]
+            else:
+                # Default price for unknown locations
+                price = 3500
+        return price * self.surface
     
     def _calculate_size_multiplier(self):
         """Calculate multiplier based on property size"""
-        if self.surface <= 40:
-            return 1.1  # Small properties have premium per m²
-        elif self.surface <= 70:
-            return 1.0
-        elif self.surface <= 100:
-            return 0.98
-        elif self.surface <= 150:
-            return 0.95
-        else:
-            return 0.92  # Large properties have discount per m²
+        return _SIZE_MULTIPLIERS[bisect_left(_SIZE_BREAKPOINTS, self.surface)]
     
     def _calculate_condition_multiplier(self):
         """Calculate multiplier based on property condition"""
-        condition_multipliers = {
-            'excellent': 1.15,
-            'good': 1.0,
-            'fair': 0.85,
-            'poor': 0.70
-        }
-        return condition_multipliers.get(self.condition, 1.0)
+        return _CONDITION_MULTIPLIERS.get(self.condition, 1.0)
     
     def _calculate_location_multiplier(self):
         """Calculate multiplier based on location factors"""
@@ -189,7 +281,7 @@ class PropertyValuation(db.Model):
     def _calculate_market_multiplier(self):
         """Calculate multiplier based on market conditions"""
         # Simulate market conditions based on current date
-        current_month = datetime.now().month
+        current_month, _ = _current_month_year()
         
         # Summer months have higher demand
         if current_month in [6, 7, 8]:
@@ -199,46 +291,42 @@ class PropertyValuation(db.Model):
         else:
             return 0.98
     
-    def _calculate_rental_potential(self):
-        """Calculate rental potential and yield"""
+    def _calculate_financials(self):
+        """Calculate rental potential, yield and ROI projections"""
+        # Work on locals and assign each column once; every attribute access
+        # on a mapped instance goes through SQLAlchemy's instrumentation
+        estimated_value = self.ai_estimated_value
+        
         # Base rental calculation (typically 0.4-0.8% of property value per month)
         base_rental_rate = 0.006  # 0.6% monthly
         
         # Adjust based on location and property type
-        if 'barcelona' in self.location.lower() or 'sitges' in self.location.lower():
+        location_lower = self.location.lower()
+        if _PRIME_RENTAL_RE.search(location_lower):
             base_rental_rate = 0.007
-        elif 'badalona' in self.location.lower() or 'maresme' in self.location.lower():
+        elif _STRONG_RENTAL_RE.search(location_lower):
             base_rental_rate = 0.0065
         
         # Property type adjustments
-        if self.property_type == 'estudio':
-            base_rental_rate *= 1.1
-        elif self.property_type == 'villa':
-            base_rental_rate *= 0.9
+        base_rental_rate *= _RENTAL_TYPE_ADJUSTMENTS.get(self.property_type, 1.0)
         
-        self.rental_potential_monthly = self.ai_estimated_value * base_rental_rate
+        monthly_rental = estimated_value * base_rental_rate
         
         # Calculate annual yield
-        annual_rental = self.rental_potential_monthly * 12
-        self.rental_yield_percentage = (annual_rental / self.ai_estimated_value) * 100 if self.ai_estimated_value > 0 else 0
-    
-    def _calculate_roi_projections(self):
-        """Calculate ROI projections for different time periods"""
-        base_appreciation = 0.04  # 4% annual appreciation
-        rental_yield = self.rental_yield_percentage / 100 if self.rental_yield_percentage else 0.06
+        annual_rental = monthly_rental * 12
+        yield_percentage = (annual_rental / estimated_value) * 100 if estimated_value > 0 else 0
+        
+        rental_yield = yield_percentage / 100 if yield_percentage else 0.06
+        
+        self.rental_potential_monthly = monthly_rental
+        self.rental_yield_percentage = yield_percentage
         
         # 1-year ROI (mainly rental yield)
         self.expected_roi_1year = rental_yield * 100
         
-        # 3-year ROI (rental + appreciation)
-        appreciation_3year = (1 + base_appreciation) ** 3 - 1
-        total_rental_3year = rental_yield * 3
-        self.expected_roi_3year = (appreciation_3year + total_rental_3year) * 100
-        
-        # 5-year ROI (rental + appreciation)
-        appreciation_5year = (1 + base_appreciation) ** 5 - 1
-        total_rental_5year = rental_yield * 5
-        self.expected_roi_5year = (appreciation_5year + total_rental_5year) * 100
+        # 3- and 5-year ROI (rental + appreciation)
+        self.expected_roi_3year = (_APPRECIATION_3YEAR + rental_yield * 3) * 100
+        self.expected_roi_5year = (_APPRECIATION_5YEAR + rental_yield * 5) * 100
     
     def _assess_risk_factors(self):
         """Assess investment risk factors"""
@@ -251,7 +339,7 @@ class PropertyValuation(db.Model):
             risk_factors.append("Mercado muy competitivo en Barcelona")
         
         # Property age risk
-        current_year = datetime.now().year
+        _, current_year = _current_month_year()
         if self.year_built and (current_year - self.year_built) > 40:
             risk_score += 2
             risk_factors.append("Propiedad antigua, posibles gastos de mantenimiento")
@@ -282,7 +370,7 @@ class PropertyValuation(db.Model):
         else:
             self.risk_level = 'high'
         
-        self.risk_factors = json.dumps(risk_factors)
+        self._set_json_list('risk_factors', risk_factors)
     
     def _calculate_confidence_score(self):
         """Calculate AI confidence score based on data quality"""
@@ -305,62 +393,37 @@ class PropertyValuation(db.Model):
             confidence += 5
         
         # Location confidence
-        known_locations = ['barcelona', 'badalona', 'sitges', 'mataró', 'calella']
-        if any(loc in self.location.lower() for loc in known_locations):
+        if _KNOWN_LOCATION_RE.search(self.location.lower()):
             confidence += 5
         
         self.ai_confidence_score = max(60, min(95, confidence))
     
     def _generate_recommendations(self):
         """Generate AI recommendations"""
-        recommendations = []
-        
-        # Investment potential
-        if self.expected_roi_1year > 8:
-            self.investment_potential = 'excellent'
-            recommendations.append("Excelente oportunidad de inversión con alta rentabilidad")
-        elif self.expected_roi_1year > 6:
-            self.investment_potential = 'good'
-            recommendations.append("Buena oportunidad de inversión")
-        elif self.expected_roi_1year > 4:
-            self.investment_potential = 'fair'
-            recommendations.append("Inversión moderada, considerar otros factores")
-        else:
-            self.investment_potential = 'poor'
-            recommendations.append("Rentabilidad baja, evaluar cuidadosamente")
+        # Investment potential, from the first tier the 1-year ROI exceeds
+        roi_1year = self.expected_roi_1year
+        for min_roi, potential, summary in _INVESTMENT_TIERS:
+            if min_roi is None or roi_1year > min_roi:
+                break
+        self.investment_potential = potential
         
         # Specific recommendations
-        if self.renovation_needed:
-            recommendations.append("Considerar programa 'Reforma sin Coste' de ESKLENCHEN")
-        
-        if self.distance_to_beach and self.distance_to_beach <= 1:
-            recommendations.append("Proximidad a la playa aumenta potencial turístico")
-        
-        if self.property_type == 'estudio' and 'barcelona' in self.location.lower():
-            recommendations.append("Estudios en Barcelona tienen alta demanda de alquiler")
+        recommendations = [summary]
+        recommendations.extend(message for applies, message in _RECOMMENDATION_RULES if applies(self))
         
-        if self.rental_yield_percentage > 7:
-            recommendations.append("Excelente potencial de alquiler turístico")
-        
-        self.ai_recommendations = json.dumps(recommendations)
+        self._set_json_list('ai_recommendations', recommendations)
     
     def get_analysis_factors(self):
         """Get analysis factors as Python list"""
-        if self.ai_analysis_factors:
-            return json.loads(self.ai_analysis_factors)
-        return []
+        return self._get_json_list('ai_analysis_factors')
     
     def get_recommendations(self):
         """Get recommendations as Python list"""
-        if self.ai_recommendations:
-            return json.loads(self.ai_recommendations)
-        return []
+        return self._get_json_list('ai_recommendations')
     
     def get_risk_factors(self):
         """Get risk factors as Python list"""
-        if self.risk_factors:
-            return json.loads(self.risk_factors)
-        return []
+        return self._get_json_list('risk_factors')
     
     def to_dict(self):
         """Convert valuation to dictionary for API responses"""
@@ -407,17 +470,57 @@ class PropertyValuation(db.Model):
     @staticmethod
     def get_recent_valuations(limit=10):
         """Get recent valuations"""
-        return PropertyValuation.query.filter_by(status='completed').order_by(
+        return PropertyValuation.query.options(db.raiseload('*')).filter_by(status='completed').order_by(
             PropertyValuation.created_at.desc()
         ).limit(limit).all()
     
+    @staticmethod
+    def recent_as_dicts(limit=10):
+        """Like get_recent_valuations, but in to_dict() form via rows_as_dicts"""
+        return PropertyValuation.rows_as_dicts(
+            PropertyValuation.query.filter_by(status='completed').order_by(
+                PropertyValuation.created_at.desc()
+            ).limit(limit)
+        )
+    
+    @staticmethod
+    def rows_as_dicts(query):
+        """Run a PropertyValuation query for just the to_dict() columns and return dicts
+
+        Builds the dicts straight from the result rows, skipping ORM instance
+        construction for read-only listings. Filters, ordering and limits on
+        query are kept.
+        """
+        columns = PropertyValuation.__table__.c
+        rows = query.with_entities(*(columns[name] for name in _DICT_COLUMNS)).all()
+        
+        valuations = []
+        for row in rows:
+            valuation = row._asdict()
+            valuation['risk_factors'] = loads(valuation['risk_factors']) if valuation['risk_factors'] else []
+            valuation['ai_recommendations'] = loads(valuation['ai_recommendations']) if valuation['ai_recommendations'] else []
+            valuation['created_at'] = valuation['created_at'].isoformat()
+            if valuation['completed_at']:
+                valuation['completed_at'] = valuation['completed_at'].isoformat()
+            valuations.append(valuation)
+        return valuations
+    
     @staticmethod
     def get_valuations_by_location(location, limit=5):
         """Get valuations by location"""
+        return PropertyValuation._location_query(location, limit).options(db.raiseload('*')).all()
+    
+    @staticmethod
+    def by_location_as_dicts(location, limit=5):
+        """Like get_valuations_by_location, but in to_dict() form via rows_as_dicts"""
+        return PropertyValuation.rows_as_dicts(PropertyValuation._location_query(location, limit))
+    
+    @staticmethod
+    def _location_query(location, limit):
         return PropertyValuation.query.filter(
             PropertyValuation.location.contains(location),
             PropertyValuation.status == 'completed'
-        ).order_by(PropertyValuation.created_at.desc()).limit(limit).all()
+        ).order_by(PropertyValuation.created_at.desc()).limit(limit)
     
     def __repr__(self):
         return f'<PropertyValuation {self.location} - {self.property_type}>'
@@ -476,4 +579,22 @@ class MarketData(db.Model):
             'data_date': self.data_date.isoformat(),
             'created_at': self.created_at.isoformat()
         }
+    
+    @staticmethod
+    def rows_as_dicts(query):
+        """Run a MarketData query for its columns and return to_dict()-shaped dicts
+
+        Builds the dicts straight from the result rows, skipping ORM instance
+        construction for read-only listings. Filters and ordering on query
+        are kept.
+        """
+        rows = query.with_entities(*MarketData.__table__.c).all()
+        
+        market_data = []
+        for row in rows:
+            data = row._asdict()
+            data['data_date'] = data['data_date'].isoformat()
+            data['created_at'] = data['created_at'].isoformat()
+            market_data.append(data)
+        return market_data
 
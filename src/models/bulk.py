@@ -0,0 +1,39 @@
+"""Batched inserts for the ESKLENCHEN models.
+
+Adding objects one by one through the session flushes one INSERT per row
+(plus the per-object unit-of-work bookkeeping). Imports and seeds go
+through bulk_insert() instead, which sends Core executemany INSERTs that
+SQLAlchemy batches into multi-row statements ("insertmanyvalues").
+"""
+from src.extensions import db
+from src.serialization import dumps
+
+
+def bulk_insert(model, rows, json_columns=(), chunk_size=1000, prepare=None):
+    """Insert rows (dicts of column values) into model's table in batches
+
+    List values for json_columns are encoded to JSON text (NULL when
+    empty), as the model's set_* accessors would. prepare(row) may fill in values the model's
+    __init__ normally derives. Column defaults apply as usual. Runs in the
+    current session; the caller commits. Returns the number of rows.
+    """
+    statement = db.insert(model)
+    count = 0
+    batch = []
+    for row in rows:
+        row = dict(row)
+        for column in json_columns:
+            value = row.get(column)
+            if isinstance(value, (list, tuple)):
+                row[column] = dumps(value).decode('utf-8') if value else None
+        if prepare is not None:
+            prepare(row)
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            db.session.execute(statement, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(statement, batch)
+        count += len(batch)
+    return count
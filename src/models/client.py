@@ -1,12 +1,34 @@
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
-import json
 
-db = SQLAlchemy()
+from src.extensions import db, trigram_index
+from src.models.bulk import bulk_insert
+from src.models.dict_cache import RowDictCache
+from src.models.json_lists import JSONListMixin
 
-class Client(db.Model):
+# Serialized clients (without project counts), reused until a client's
+# updated_at changes
+_DICT_CACHE = RowDictCache()
+
+class Client(JSONListMixin, db.Model):
     __tablename__ = 'clients'
+    __table_args__ = (
+        # Status counts / filtered listings and newest-first listings
+        db.Index('ix_clients_status_created_at', 'status', 'created_at'),
+        db.Index('ix_clients_created_at', 'created_at'),
+        # Top investors and top ROI rankings; both only look at clients with
+        # a positive figure, so the indexes skip everyone else
+        db.Index('ix_clients_active_investors', 'total_invested',
+                 postgresql_where=db.text('total_invested > 0'),
+                 sqlite_where=db.text('total_invested > 0')),
+        db.Index('ix_clients_positive_roi', 'average_roi',
+                 postgresql_where=db.text('average_roi > 0'),
+                 sqlite_where=db.text('average_roi > 0')),
+        # search_clients substring matches
+        trigram_index('ix_clients_first_name_trgm', 'first_name'),
+        trigram_index('ix_clients_last_name_trgm', 'last_name'),
+        trigram_index('ix_clients_email_trgm', 'email'),
+        trigram_index('ix_clients_company_trgm', 'company'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -78,65 +100,54 @@ class Client(db.Model):
     
     @property
     def full_address(self):
-        address_parts = [
+        return ", ".join(filter(None, (
             self.address_line1,
             self.address_line2,
             self.city,
             self.state_province,
             self.postal_code,
             self.country
-        ]
-        return ", ".join([part for part in address_parts if part])
+        )))
     
     def get_investment_goals(self):
         """Get investment goals as Python list"""
-        if self.investment_goals:
-            return json.loads(self.investment_goals)
-        return []
+        return self._get_json_list('investment_goals')
     
     def set_investment_goals(self, goals_list):
         """Set investment goals from Python list"""
-        self.investment_goals = json.dumps(goals_list)
+        self._set_json_list('investment_goals', goals_list)
     
     def get_preferred_locations(self):
         """Get preferred locations as Python list"""
-        if self.preferred_locations:
-            return json.loads(self.preferred_locations)
-        return []
+        return self._get_json_list('preferred_locations')
     
     def set_preferred_locations(self, locations_list):
         """Set preferred locations from Python list"""
-        self.preferred_locations = json.dumps(locations_list)
+        self._set_json_list('preferred_locations', locations_list)
     
     def get_preferred_property_types(self):
         """Get preferred property types as Python list"""
-        if self.preferred_property_types:
-            return json.loads(self.preferred_property_types)
-        return []
+        return self._get_json_list('preferred_property_types')
     
     def set_preferred_property_types(self, types_list):
         """Set preferred property types from Python list"""
-        self.preferred_property_types = json.dumps(types_list)
+        self._set_json_list('preferred_property_types', types_list)
     
     def get_kyc_documents(self):
         """Get KYC documents as Python list"""
-        if self.kyc_documents:
-            return json.loads(self.kyc_documents)
-        return []
+        return self._get_json_list('kyc_documents')
     
     def set_kyc_documents(self, documents_list):
         """Set KYC documents from Python list"""
-        self.kyc_documents = json.dumps(documents_list)
+        self._set_json_list('kyc_documents', documents_list)
     
     def get_tags(self):
         """Get tags as Python list"""
-        if self.tags:
-            return json.loads(self.tags)
-        return []
+        return self._get_json_list('tags')
     
     def set_tags(self, tags_list):
         """Set tags from Python list"""
-        self.tags = json.dumps(tags_list)
+        self._set_json_list('tags', tags_list)
     
     def calculate_portfolio_performance(self):
         """Calculate overall portfolio performance"""
@@ -150,18 +161,60 @@ class Client(db.Model):
             'average_roi': self.average_roi
         }
     
+    @staticmethod
+    def recompute_all_portfolios():
+        """Recompute total_profit and average_roi for every invested client
+
+        One UPDATE with the same formulas as calculate_portfolio_performance,
+        instead of loading and updating clients one at a time. Clients with
+        nothing invested are left unchanged, as there. The caller commits.
+        Returns the number of clients updated.
+        """
+        profit = Client.total_revenue - Client.total_invested
+        result = db.session.execute(
+            db.update(Client)
+            .where(Client.total_invested > 0)
+            .values(total_profit=profit, average_roi=profit / Client.total_invested * 100)
+        )
+        return result.rowcount
+    
+    def _count_loaded_projects(self, status):
+        """Count projects with status if the projects collection is loaded, else None"""
+        if 'projects' in db.inspect(self).unloaded:
+            return None
+        return sum(1 for project in self.projects if project.status == status)
+    
     def get_active_projects_count(self):
         """Get count of active projects"""
-        from src.models.project import Project
-        return Project.query.filter_by(client_id=self.id, status='active').count()
+        count = self._count_loaded_projects('active')
+        if count is None:
+            from src.models.project import Project
+            count = Project.query.filter_by(client_id=self.id, status='active').count()
+        return count
     
     def get_completed_projects_count(self):
         """Get count of completed projects"""
-        from src.models.project import Project
-        return Project.query.filter_by(client_id=self.id, status='completed').count()
+        count = self._count_loaded_projects('completed')
+        if count is None:
+            from src.models.project import Project
+            count = Project.query.filter_by(client_id=self.id, status='completed').count()
+        return count
+    
+    def to_dict(self, include_sensitive=False, project_counts=None):
+        """Convert client to dictionary for API responses
+
+        project_counts is an (active, completed) pair already fetched by the
+        caller; without it both counts are queried for this client.
+        """
+        if project_counts is None:
+            project_counts = (self.get_active_projects_count(), self.get_completed_projects_count())
+        
+        data = _DICT_CACHE.get(self, lambda: self._build_dict(include_sensitive), include_sensitive)
+        data['active_projects_count'] = project_counts[0]
+        data['completed_projects_count'] = project_counts[1]
+        return data
     
-    def to_dict(self, include_sensitive=False):
-        """Convert client to dictionary for API responses"""
+    def _build_dict(self, include_sensitive):
         data = {
             'id': self.id,
             'first_name': self.first_name,
@@ -194,9 +247,7 @@ class Client(db.Model):
             'tags': self.get_tags(),
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'last_contact_date': self.last_contact_date.isoformat() if self.last_contact_date else None,
-            'active_projects_count': self.get_active_projects_count(),
-            'completed_projects_count': self.get_completed_projects_count()
+            'last_contact_date': self.last_contact_date.isoformat() if self.last_contact_date else None
         }
         
         if include_sensitive:
@@ -212,6 +263,75 @@ class Client(db.Model):
         
         return data
     
+    @staticmethod
+    def serialize_many(clients, include_sensitive=False):
+        """Convert clients to dictionaries, counting their projects in one query"""
+        from src.models.project import Project
+        
+        counts = {client.id: [0, 0] for client in clients}
+        if counts:
+            rows = db.session.query(
+                Project.client_id,
+                Project.status,
+                db.func.count(Project.id)
+            ).filter(
+                Project.client_id.in_(counts),
+                Project.status.in_(('active', 'completed'))
+            ).group_by(Project.client_id, Project.status)
+            
+            for client_id, status, count in rows:
+                counts[client_id][0 if status == 'active' else 1] = count
+        
+        return [
+            client.to_dict(include_sensitive, project_counts=counts[client.id])
+            for client in clients
+        ]
+    
+    @staticmethod
+    def query_with_counts():
+        """Query (client, active projects, completed projects) rows in one statement
+
+        Filter with filter() on Client columns (filter_by would target the
+        joined Project). Pass the counts to to_dict(project_counts=...).
+        """
+        from src.models.project import Project
+        
+        return db.session.query(
+            Client,
+            db.func.count(db.case((Project.status == 'active', 1))),
+            db.func.count(db.case((Project.status == 'completed', 1)))
+        ).outerjoin(Project, Project.client_id == Client.id).group_by(Client.id)
+    
+    @staticmethod
+    def bulk_create(rows, chunk_size=1000):
+        """Insert many clients (dicts of column values) in batched INSERTs
+
+        For imports and seeds. List values for the JSON columns are encoded.
+        The caller commits.
+        """
+        return bulk_insert(
+            Client, rows,
+            json_columns=(
+                'investment_goals', 'preferred_locations', 'preferred_property_types',
+                'kyc_documents', 'tags'
+            ),
+            chunk_size=chunk_size
+        )
+    
+    @staticmethod
+    def query_with_relations(*relations):
+        """Client query that eagerly loads the named relationships
+
+        relations defaults to projects, contacts and documents. Each one is
+        fetched with a single SELECT ... IN over all returned clients, so
+        reading it across a list of clients doesn't cost a query per client.
+        """
+        query = Client.query
+        return query.options(*(
+            db.selectinload(getattr(Client, name))
+            for name in relations or ('projects', 'contacts', 'documents')
+        ))
+    
     @staticmethod
     def search_clients(query_text, status=None, client_type=None, kyc_status=None):
         """Search clients with filters"""
@@ -0,0 +1,45 @@
+"""Per-process cache of serialized model rows.
+
+to_dict() on a list endpoint reads ~35 instrumented attributes, formats
+the timestamps and parses the JSON list columns of every row, even though
+most rows haven't changed since the last request. Rows with an updated_at
+column (bumped by onupdate on every UPDATE) can key their serialized form
+on (id, updated_at, ...) and reuse it until the row changes.
+"""
+import threading
+from collections import OrderedDict
+
+from src.extensions import db
+
+
+class RowDictCache:
+    """Bounded LRU mapping (id, updated_at, ...) keys to to_dict() output"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, instance, build, *variant):
+        """Return build() for instance, reusing the result while the row is unchanged
+
+        Rows that aren't persisted yet or have unflushed changes are built
+        fresh, since their updated_at doesn't describe their contents. The
+        returned dict is a shallow copy; its lists are shared with the cache
+        and must not be modified.
+        """
+        if instance.id is None or instance.updated_at is None or db.inspect(instance).modified:
+            return build()
+
+        key = (instance.id, instance.updated_at) + variant
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+        if data is None:
+            data = build()
+            with self._lock:
+                self._entries[key] = data
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return dict(data)
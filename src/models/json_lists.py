@@ -0,0 +1,29 @@
+"""JSON list columns for the ESKLENCHEN models.
+
+Small lists (tags, features, recommendations, ...) are stored as JSON in
+Text columns. JSONListMixin encodes and parses them through
+src.serialization and keeps the parsed value on the instance, so reading
+an unchanged column again doesn't re-parse it. Empty lists are stored as
+NULL, so reading them never reaches the parser.
+"""
+from src.serialization import dumps, loads
+
+
+class JSONListMixin:
+    """Accessors for Text columns holding a JSON list"""
+
+    def _get_json_list(self, column):
+        """Parse a JSON list column, reusing the parsed value until the column changes"""
+        raw = getattr(self, column)
+        if not raw:
+            return []
+        cache = self.__dict__.setdefault('_json_cache', {})
+        cached = cache.get(column)
+        if cached is None or cached[0] is not raw:
+            cached = cache[column] = (raw, loads(raw))
+        # Copy so callers can't alter the cached value
+        return list(cached[1])
+
+    def _set_json_list(self, column, values):
+        """Store values as JSON in column, or NULL when there are none"""
+        setattr(self, column, dumps(values).decode('utf-8') if values else None)
@@ -1,11 +1,63 @@
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-import json
+import re
 
-db = SQLAlchemy()
+from src.extensions import db, trigram_index
+from src.models.bulk import bulk_insert
+from src.models.dict_cache import RowDictCache
+from src.models.json_lists import JSONListMixin
+from src.serialization import loads
 
-class Project(db.Model):
+# generate_slug: drop punctuation, then collapse whitespace/dashes to one dash
+_SLUG_STRIP_RE = re.compile(r'[^\w\s-]')
+_SLUG_DASH_RE = re.compile(r'[-\s]+')
+
+
+def _slugify(title):
+    slug = _SLUG_STRIP_RE.sub('', title.lower())
+    slug = _SLUG_DASH_RE.sub('-', slug)
+    return slug.strip('-')
+
+
+def _fill_slug(row):
+    if not row.get('slug'):
+        row['slug'] = _slugify(row['title'])
+
+
+# Columns serialized by Project.to_dict()
+_DICT_COLUMNS = (
+    'id', 'title', 'description', 'location', 'property_type', 'category',
+    'surface', 'rooms', 'bathrooms', 'floor', 'year_built', 'purchase_price',
+    'renovation_cost', 'total_investment', 'expected_revenue', 'actual_revenue',
+    'roi_percentage', 'start_date', 'completion_date', 'duration_days', 'status',
+    'occupancy_rate', 'average_rating', 'total_reviews', 'main_image',
+    'before_image', 'after_image', 'gallery_images', 'features', 'amenities',
+    'slug', 'meta_title', 'meta_description', 'created_at', 'updated_at',
+    'client_id'
+)
+
+# Rows fetched per round trip by the iter_* streaming queries
+_STREAM_BATCH = 500
+
+# Serialized projects, reused until a project's updated_at changes
+_DICT_CACHE = RowDictCache()
+
+class Project(JSONListMixin, db.Model):
     __tablename__ = 'projects'
+    __table_args__ = (
+        # Status counts / filtered listings, newest-first listings, and the
+        # per-client project counts
+        db.Index('ix_projects_status_created_at', 'status', 'created_at'),
+        db.Index('ix_projects_created_at', 'created_at'),
+        db.Index('ix_projects_client_id_status', 'client_id', 'status'),
+        # Featured projects (completed, best ROI and rating first)
+        db.Index('ix_projects_status_roi_rating', 'status', 'roi_percentage', 'average_rating'),
+        # Per-category listings, newest first
+        db.Index('ix_projects_category_created_at', 'category', 'created_at'),
+        # search_projects substring matches
+        trigram_index('ix_projects_title_trgm', 'title'),
+        trigram_index('ix_projects_description_trgm', 'description'),
+        trigram_index('ix_projects_location_trgm', 'location'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -70,40 +122,31 @@ class Project(db.Model):
     
     def generate_slug(self):
         """Generate URL-friendly slug from title"""
-        import re
-        slug = re.sub(r'[^\w\s-]', '', self.title.lower())
-        slug = re.sub(r'[-\s]+', '-', slug)
-        return slug.strip('-')
+        return _slugify(self.title)
     
     def get_features(self):
         """Get features as Python list"""
-        if self.features:
-            return json.loads(self.features)
-        return []
+        return self._get_json_list('features')
     
     def set_features(self, features_list):
         """Set features from Python list"""
-        self.features = json.dumps(features_list)
+        self._set_json_list('features', features_list)
     
     def get_amenities(self):
         """Get amenities as Python list"""
-        if self.amenities:
-            return json.loads(self.amenities)
-        return []
+        return self._get_json_list('amenities')
     
     def set_amenities(self, amenities_list):
         """Set amenities from Python list"""
-        self.amenities = json.dumps(amenities_list)
+        self._set_json_list('amenities', amenities_list)
     
     def get_gallery_images(self):
         """Get gallery images as Python list"""
-        if self.gallery_images:
-            return json.loads(self.gallery_images)
-        return []
+        return self._get_json_list('gallery_images')
     
     def set_gallery_images(self, images_list):
         """Set gallery images from Python list"""
-        self.gallery_images = json.dumps(images_list)
+        self._set_json_list('gallery_images', images_list)
     
     def calculate_roi(self):
         """Calculate ROI percentage"""
@@ -119,6 +162,9 @@ class Project(db.Model):
     
     def to_dict(self):
         """Convert project to dictionary for API responses"""
+        return _DICT_CACHE.get(self, self._build_dict)
+    
+    def _build_dict(self):
         return {
             'id': self.id,
             'title': self.title,
@@ -158,6 +204,44 @@ class Project(db.Model):
             'client_id': self.client_id
         }
     
+    @staticmethod
+    def rows_as_dicts(query):
+        """Run a Project query for just the to_dict() columns and return dicts
+
+        Builds the dicts straight from the result rows, skipping ORM instance
+        construction for read-only listings. Filters, ordering and limits on
+        query are kept.
+        """
+        columns = Project.__table__.c
+        rows = query.with_entities(*(columns[name] for name in _DICT_COLUMNS)).all()
+        
+        projects = []
+        for row in rows:
+            project = row._asdict()
+            for name in ('gallery_images', 'features', 'amenities'):
+                project[name] = loads(project[name]) if project[name] else []
+            for name in ('start_date', 'completion_date'):
+                if project[name]:
+                    project[name] = project[name].isoformat()
+            project['created_at'] = project['created_at'].isoformat()
+            project['updated_at'] = project['updated_at'].isoformat()
+            projects.append(project)
+        return projects
+    
+    @staticmethod
+    def bulk_create(rows, chunk_size=1000):
+        """Insert many projects (dicts of column values) in batched INSERTs
+
+        For imports and seeds. Slugs are derived from titles as in __init__
+        and list values for the JSON columns are encoded. The caller commits.
+        """
+        return bulk_insert(
+            Project, rows,
+            json_columns=('gallery_images', 'features', 'amenities'),
+            chunk_size=chunk_size,
+            prepare=_fill_slug
+        )
+    
     @staticmethod
     def get_featured_projects(limit=6):
         """Get featured projects for homepage"""
@@ -169,14 +253,32 @@ class Project(db.Model):
     @staticmethod
     def get_by_category(category, limit=None):
         """Get projects by category"""
+        return Project._category_query(category, limit).all()
+    
+    @staticmethod
+    def iter_by_category(category, limit=None):
+        """Like get_by_category, but stream rows in batches of _STREAM_BATCH"""
+        return Project._category_query(category, limit).yield_per(_STREAM_BATCH)
+    
+    @staticmethod
+    def _category_query(category, limit=None):
         query = Project.query.filter_by(category=category).order_by(Project.created_at.desc())
         if limit:
             query = query.limit(limit)
-        return query.all()
+        return query
     
     @staticmethod
     def search_projects(query_text, location=None, property_type=None, category=None):
         """Search projects with filters"""
+        return Project._search_query(query_text, location, property_type, category).all()
+    
+    @staticmethod
+    def iter_search_projects(query_text, location=None, property_type=None, category=None):
+        """Like search_projects, but stream rows in batches of _STREAM_BATCH"""
+        return Project._search_query(query_text, location, property_type, category).yield_per(_STREAM_BATCH)
+    
+    @staticmethod
+    def _search_query(query_text, location=None, property_type=None, category=None):
         query = Project.query
         
         if query_text:
@@ -197,7 +299,7 @@ class Project(db.Model):
         if category:
             query = query.filter_by(category=category)
         
-        return query.order_by(Project.created_at.desc()).all()
+        return query.order_by(Project.created_at.desc())
     
     def __repr__(self):
         return f'<Project {self.title}>'
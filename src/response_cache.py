@@ -0,0 +1,46 @@
+"""Per-process cache of encoded JSON response bodies.
+
+Read-heavy listings polled by dashboards (market data, valuations per
+location) return the same body for the same query string until the
+underlying rows change. ResponseCache keeps the encoded body for a short
+TTL so repeated requests skip the query and the JSON encoding. Each
+gunicorn worker has its own cache; writes clear the local one and the TTL
+bounds staleness in the others.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """Bounded LRU mapping request keys to encoded bodies, each kept for ttl seconds"""
+
+    def __init__(self, ttl, maxsize=256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        """Return the cached body for key, or build(), cache and return it
+
+        Exceptions from build() propagate and nothing is cached.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+        body = build()
+        with self._lock:
+            self._entries[key] = (now + self.ttl, body)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return body
+
+    def clear(self):
+        """Drop every cached body"""
+        with self._lock:
+            self._entries.clear()
@@ -1,11 +1,72 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_cors import cross_origin
 from src.models.ai_valuation import db, PropertyValuation, MarketData
+from src.response_cache import ResponseCache
 from datetime import datetime, date
+from types import MappingProxyType
 import time
 
 ai_valuation_bp = Blueprint('ai_valuation', __name__)
 
+# Encoded market data and per-location listings, keyed by path and query
+# string; cleared whenever this worker creates a valuation
+_LISTING_CACHE = ResponseCache(ttl=60)
+
+def _cached_listing(build):
+    """Respond with build()'s payload as JSON, reusing the encoded body for a minute"""
+    body = _LISTING_CACHE.get(
+        (request.path, request.query_string),
+        lambda: current_app.json.dumps(build()).encode('utf-8')
+    )
+    return current_app.response_class(body, mimetype='application/json')
+
+# Fields each POST endpoint requires in its JSON body
+_CREATE_REQUIRED = frozenset(('location', 'property_type', 'surface'))
+_QUICK_REQUIRED = frozenset(('location', 'surface'))
+_RENOVATION_REQUIRED = frozenset(('location', 'property_type', 'surface', 'current_condition'))
+
+def _missing_fields_response(data, required):
+    """Return a 400 response listing every required field missing from data, or None"""
+    missing = required - data.keys()
+    if not missing:
+        return None
+    missing = sorted(missing)
+    return jsonify({
+        'success': False,
+        'error': f"Missing required fields: {', '.join(missing)}",
+        'fields': missing
+    }), 400
+
+# Average renovation cost per m², scaled by the property's current condition
+_RENOVATION_COST_PER_SQM = 800
+_RENOVATION_CONDITION_MULTIPLIERS = MappingProxyType({
+    'poor': 1.3,
+    'fair': 1.1,
+    'good': 0.8,
+    'excellent': 0.5
+})
+
+# Expected uplift after renovation: +25% property value, +40% rental income
+_RENOVATION_VALUE_UPLIFT = 1.25
+_RENOVATION_RENTAL_UPLIFT = 1.4
+
+_RENOVATION_PROGRAM_BENEFITS = (
+    "Financiación 100% de la reforma",
+    "Sin coste inicial para el propietario",
+    "Gestión completa del proyecto",
+    "Garantía de calidad y plazos",
+    "Incremento inmediato del valor",
+    "Optimización para alquiler turístico"
+)
+
+_RENOVATION_NEXT_STEPS = (
+    "Visita técnica gratuita",
+    "Presupuesto detallado",
+    "Firma del acuerdo",
+    "Inicio de obras",
+    "Entrega y puesta en marcha"
+)
+
 @ai_valuation_bp.route('/valuation/property', methods=['POST'])
 @cross_origin()
 def create_property_valuation():
@@ -14,13 +75,9 @@ def create_property_valuation():
         data = request.get_json()
         
         # Validate required fields
-        required_fields = ['location', 'property_type', 'surface']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'success': False,
-                    'error': f'Missing required field: {field}'
-                }), 400
+        error = _missing_fields_response(data, _CREATE_REQUIRED)
+        if error:
+            return error
         
         # Record start time for processing time calculation
         start_time = time.time()
@@ -54,11 +111,17 @@ def create_property_valuation():
         valuation.processing_time_seconds = processing_time
         
         db.session.add(valuation)
+        # The flush fills in the id (INSERT ... RETURNING); serialize before
+        # the commit expires the instance, as reading it after would SELECT
+        # the row again
+        db.session.flush()
+        valuation_data = valuation.to_dict()
         db.session.commit()
+        _LISTING_CACHE.clear()
         
         return jsonify({
             'success': True,
-            'valuation': valuation.to_dict(),
+            'valuation': valuation_data,
             'message': 'Property valuation completed successfully',
             'processing_time': f"{processing_time:.2f} seconds"
         }), 201
@@ -78,13 +141,9 @@ def quick_valuation():
         data = request.get_json()
         
         # Validate required fields
-        required_fields = ['location', 'surface']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'success': False,
-                    'error': f'Missing required field: {field}'
-                }), 400
+        error = _missing_fields_response(data, _QUICK_REQUIRED)
+        if error:
+            return error
         
         # Create simplified valuation
         valuation = PropertyValuation(
@@ -100,10 +159,12 @@ def quick_valuation():
         )
         
         db.session.add(valuation)
-        db.session.commit()
+        # Build the response before the commit expires the instance (see
+        # create_property_valuation)
+        db.session.flush()
         
         # Return simplified response for quick valuation
-        return jsonify({
+        response = {
             'success': True,
             'valuation_id': valuation.id,
             'estimated_value': valuation.ai_estimated_value,
@@ -115,7 +176,11 @@ def quick_valuation():
             'confidence_score': valuation.ai_confidence_score,
             'recommendations': valuation.get_recommendations()[:3],  # Top 3 recommendations
             'message': 'Valoración completada. Un experto te contactará pronto para análisis detallado.'
-        })
+        }
+        db.session.commit()
+        _LISTING_CACHE.clear()
+        
+        return jsonify(response)
         
     except Exception as e:
         db.session.rollback()
@@ -152,6 +217,19 @@ def get_valuations():
         status = request.args.get('status')
         requester_email = request.args.get('requester_email')
         limit = request.args.get('limit', type=int)
+        # Keyset cursor: the created_at and id of the last valuation of the
+        # previous page, given together or not at all
+        before_created_at = request.args.get('before_created_at')
+        before_id = request.args.get('before_id')
+        cursor = None
+        if before_created_at or before_id:
+            try:
+                cursor = (datetime.fromisoformat(before_created_at), int(before_id))
+            except (TypeError, ValueError):
+                return jsonify({
+                    'success': False,
+                    'error': 'before_created_at (ISO 8601) and before_id (integer) must be given together'
+                }), 400
         
         # Build query
         query = PropertyValuation.query
@@ -165,18 +243,30 @@ def get_valuations():
         if requester_email:
             query = query.filter_by(requester_email=requester_email)
         
-        # Order by creation date (newest first)
-        query = query.order_by(PropertyValuation.created_at.desc())
+        if cursor:
+            query = query.filter(
+                db.tuple_(PropertyValuation.created_at, PropertyValuation.id) < cursor
+            )
+        
+        # Order by creation date (newest first), id breaking ties so pages
+        # never skip or repeat valuations
+        query = query.order_by(PropertyValuation.created_at.desc(), PropertyValuation.id.desc())
         
         if limit:
             query = query.limit(limit)
         
-        valuations = query.all()
+        valuations = PropertyValuation.rows_as_dicts(query)
+        
+        next_cursor = None
+        if limit and len(valuations) == limit:
+            last = valuations[-1]
+            next_cursor = {'before_created_at': last['created_at'], 'before_id': last['id']}
         
         return jsonify({
             'success': True,
-            'valuations': [valuation.to_dict() for valuation in valuations],
-            'total': len(valuations)
+            'valuations': valuations,
+            'total': len(valuations),
+            'next_cursor': next_cursor
         })
         
     except Exception as e:
@@ -191,11 +281,9 @@ def get_recent_valuations():
     """Get recent valuations"""
     try:
         limit = request.args.get('limit', 10, type=int)
-        valuations = PropertyValuation.get_recent_valuations(limit)
-        
         return jsonify({
             'success': True,
-            'valuations': [valuation.to_dict() for valuation in valuations]
+            'valuations': PropertyValuation.recent_as_dicts(limit)
         })
         
     except Exception as e:
@@ -210,12 +298,10 @@ def get_valuations_by_location(location):
     """Get valuations by location"""
     try:
         limit = request.args.get('limit', 5, type=int)
-        valuations = PropertyValuation.get_valuations_by_location(location, limit)
-        
-        return jsonify({
+        return _cached_listing(lambda: {
             'success': True,
             'location': location,
-            'valuations': [valuation.to_dict() for valuation in valuations]
+            'valuations': PropertyValuation.by_location_as_dicts(location, limit)
         })
         
     except Exception as e:
@@ -232,19 +318,20 @@ def get_market_data():
         location = request.args.get('location')
         property_type = request.args.get('property_type')
         
-        query = MarketData.query
-        
-        if location:
-            query = query.filter(MarketData.location.contains(location))
-        if property_type:
-            query = query.filter_by(property_type=property_type)
+        def build():
+            query = MarketData.query
+            
+            if location:
+                query = query.filter(MarketData.location.contains(location))
+            if property_type:
+                query = query.filter_by(property_type=property_type)
+            
+            return {
+                'success': True,
+                'market_data': MarketData.rows_as_dicts(query.order_by(MarketData.data_date.desc()))
+            }
         
-        market_data = query.order_by(MarketData.data_date.desc()).all()
-        
-        return jsonify({
-            'success': True,
-            'market_data': [data.to_dict() for data in market_data]
-        })
+        return _cached_listing(build)
         
     except Exception as e:
         return jsonify({
@@ -318,40 +405,38 @@ def compare_properties():
 def get_valuation_stats():
     """Get valuation statistics"""
     try:
-        total_valuations = PropertyValuation.query.count()
-        completed_valuations = PropertyValuation.query.filter_by(status='completed').count()
-        
-        # Average confidence score
-        avg_confidence = db.session.query(db.func.avg(PropertyValuation.ai_confidence_score)).scalar() or 0
-        
-        # Average processing time
-        avg_processing_time = db.session.query(db.func.avg(PropertyValuation.processing_time_seconds)).scalar() or 0
-        
-        # Valuations by location
-        locations = db.session.query(
-            PropertyValuation.location,
-            db.func.count(PropertyValuation.id),
-            db.func.avg(PropertyValuation.price_per_sqm)
-        ).group_by(PropertyValuation.location).limit(10).all()
-        
-        # Valuations by property type
-        property_types = db.session.query(
-            PropertyValuation.property_type,
+        # Counts and averages in one aggregate query
+        (total_valuations, completed_valuations,
+         avg_confidence, avg_processing_time) = PropertyValuation.query.with_entities(
             db.func.count(PropertyValuation.id),
-            db.func.avg(PropertyValuation.ai_estimated_value)
-        ).group_by(PropertyValuation.property_type).all()
-        
-        # Investment potential distribution
-        investment_potential = db.session.query(
-            PropertyValuation.investment_potential,
-            db.func.count(PropertyValuation.id)
-        ).group_by(PropertyValuation.investment_potential).all()
-        
-        # Risk level distribution
-        risk_levels = db.session.query(
-            PropertyValuation.risk_level,
-            db.func.count(PropertyValuation.id)
-        ).group_by(PropertyValuation.risk_level).all()
+            db.func.count(db.case((PropertyValuation.status == 'completed', 1))),
+            db.func.coalesce(db.func.avg(PropertyValuation.ai_confidence_score), 0),
+            db.func.coalesce(db.func.avg(PropertyValuation.processing_time_seconds), 0)
+        ).one()
+        
+        # The four breakdowns (top locations, property types, investment
+        # potential and risk level) as one UNION ALL, tagged by breakdown
+        def breakdown(name, column, average=None):
+            return db.select(
+                db.literal(name).label('breakdown'),
+                column.label('value'),
+                db.func.count(PropertyValuation.id).label('count'),
+                (db.func.avg(average) if average is not None else db.null()).label('average')
+            ).group_by(column)
+        
+        top_locations = breakdown(
+            'location', PropertyValuation.location, PropertyValuation.price_per_sqm
+        ).limit(10).subquery()
+        breakdowns = db.session.execute(db.union_all(
+            db.select(top_locations),
+            breakdown('property_type', PropertyValuation.property_type, PropertyValuation.ai_estimated_value),
+            breakdown('investment_potential', PropertyValuation.investment_potential),
+            breakdown('risk_level', PropertyValuation.risk_level)
+        )).all()
+        
+        grouped = {'location': [], 'property_type': [], 'investment_potential': [], 'risk_level': []}
+        for name, value, count, average in breakdowns:
+            grouped[name].append((value, count, average))
         
         return jsonify({
             'success': True,
@@ -366,7 +451,7 @@ def get_valuation_stats():
                         'count': count,
                         'avg_price_per_sqm': round(avg_price, 2) if avg_price else 0
                     }
-                    for loc, count, avg_price in locations
+                    for loc, count, avg_price in grouped['location']
                 ],
                 'property_types': [
                     {
@@ -374,15 +459,15 @@ def get_valuation_stats():
                         'count': count,
                         'avg_value': round(avg_value, 2) if avg_value else 0
                     }
-                    for prop_type, count, avg_value in property_types
+                    for prop_type, count, avg_value in grouped['property_type']
                 ],
                 'investment_potential': [
                     {'potential': potential, 'count': count}
-                    for potential, count in investment_potential
+                    for potential, count, _ in grouped['investment_potential']
                 ],
                 'risk_levels': [
                     {'risk_level': risk, 'count': count}
-                    for risk, count in risk_levels
+                    for risk, count, _ in grouped['risk_level']
                 ]
             }
         })
@@ -401,13 +486,9 @@ def generate_renovation_proposal():
         data = request.get_json()
         
         # Validate required fields
-        required_fields = ['location', 'property_type', 'surface', 'current_condition']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'success': False,
-                    'error': f'Missing required field: {field}'
-                }), 400
+        error = _missing_fields_response(data, _RENOVATION_REQUIRED)
+        if error:
+            return error
         
         # Create valuation for renovation analysis
         valuation = PropertyValuation(
@@ -423,62 +504,48 @@ def generate_renovation_proposal():
             request_purpose='renovation_proposal'
         )
         
-        # Calculate renovation costs and potential
-        base_renovation_cost = valuation.surface * 800  # €800 per m² average
-        
-        # Adjust based on condition
-        condition_multipliers = {
-            'poor': 1.3,
-            'fair': 1.1,
-            'good': 0.8,
-            'excellent': 0.5
-        }
-        
-        renovation_cost = base_renovation_cost * condition_multipliers.get(data['current_condition'], 1.0)
+        # Calculate renovation costs, adjusted for the current condition
+        renovation_cost = (
+            valuation.surface * _RENOVATION_COST_PER_SQM
+            * _RENOVATION_CONDITION_MULTIPLIERS.get(data['current_condition'], 1.0)
+        )
         valuation.estimated_renovation_cost = renovation_cost
         
-        # Calculate post-renovation value
-        post_renovation_value = valuation.ai_estimated_value * 1.25  # 25% increase after renovation
-        
-        # Calculate program benefits
-        monthly_rental_post_renovation = valuation.rental_potential_monthly * 1.4  # 40% increase
+        # Calculate post-renovation value and program benefits
+        current_value = valuation.ai_estimated_value
+        current_rental = valuation.rental_potential_monthly
+        post_renovation_value = current_value * _RENOVATION_VALUE_UPLIFT
+        monthly_rental_post_renovation = current_rental * _RENOVATION_RENTAL_UPLIFT
         annual_rental = monthly_rental_post_renovation * 12
         payback_period_months = renovation_cost / monthly_rental_post_renovation if monthly_rental_post_renovation > 0 else 0
         
         db.session.add(valuation)
+        # Read what the response needs before the commit expires the
+        # instance (see create_property_valuation)
+        db.session.flush()
+        valuation_id = valuation.id
+        confidence_score = valuation.ai_confidence_score
         db.session.commit()
+        _LISTING_CACHE.clear()
         
         return jsonify({
             'success': True,
-            'valuation_id': valuation.id,
+            'valuation_id': valuation_id,
             'renovation_proposal': {
-                'current_value': valuation.ai_estimated_value,
+                'current_value': current_value,
                 'post_renovation_value': post_renovation_value,
-                'value_increase': post_renovation_value - valuation.ai_estimated_value,
+                'value_increase': post_renovation_value - current_value,
                 'renovation_cost': renovation_cost,
-                'current_rental_potential': valuation.rental_potential_monthly,
+                'current_rental_potential': current_rental,
                 'post_renovation_rental': monthly_rental_post_renovation,
-                'rental_increase': monthly_rental_post_renovation - valuation.rental_potential_monthly,
+                'rental_increase': monthly_rental_post_renovation - current_rental,
                 'annual_rental_income': annual_rental,
                 'payback_period_months': round(payback_period_months, 1),
                 'roi_first_year': round((annual_rental / renovation_cost) * 100, 2) if renovation_cost > 0 else 0,
-                'program_benefits': [
-                    "Financiación 100% de la reforma",
-                    "Sin coste inicial para el propietario",
-                    "Gestión completa del proyecto",
-                    "Garantía de calidad y plazos",
-                    "Incremento inmediato del valor",
-                    "Optimización para alquiler turístico"
-                ],
-                'next_steps': [
-                    "Visita técnica gratuita",
-                    "Presupuesto detallado",
-                    "Firma del acuerdo",
-                    "Inicio de obras",
-                    "Entrega y puesta en marcha"
-                ]
+                'program_benefits': _RENOVATION_PROGRAM_BENEFITS,
+                'next_steps': _RENOVATION_NEXT_STEPS
             },
-            'confidence_score': valuation.ai_confidence_score,
+            'confidence_score': confidence_score,
             'message': 'Propuesta de reforma generada. Te contactaremos para concretar detalles.'
         })
         
@@ -2,7 +2,6 @@ from flask import Blueprint, request, jsonify
 from flask_cors import cross_origin
 from src.models.client import db, Client, ClientContact, ClientDocument
 from datetime import datetime, date
-import json
 
 clients_bp = Blueprint('clients', __name__)
 
@@ -20,27 +19,33 @@ def get_clients():
         
         # Build query
         if search:
-            clients = Client.search_clients(search, status, client_type, kyc_status)
+            clients = Client.serialize_many(
+                Client.search_clients(search, status, client_type, kyc_status)
+            )
         else:
-            query = Client.query
+            # Clients and their project counts in a single statement
+            query = Client.query_with_counts()
             
             if status:
-                query = query.filter_by(status=status)
+                query = query.filter(Client.status == status)
             if client_type:
-                query = query.filter_by(client_type=client_type)
+                query = query.filter(Client.client_type == client_type)
             if kyc_status:
-                query = query.filter_by(kyc_status=kyc_status)
+                query = query.filter(Client.kyc_status == kyc_status)
             
             query = query.order_by(Client.created_at.desc())
             
             if limit:
                 query = query.limit(limit)
             
-            clients = query.all()
+            clients = [
+                client.to_dict(project_counts=(active, completed))
+                for client, active, completed in query.all()
+            ]
         
         return jsonify({
             'success': True,
-            'clients': [client.to_dict() for client in clients],
+            'clients': clients,
             'total': len(clients)
         })
         
@@ -342,11 +347,9 @@ def get_client_documents(client_id):
 def get_client_portfolio(client_id):
     """Get client's investment portfolio performance"""
     try:
-        client = Client.query.get_or_404(client_id)
-        
-        # Get client's projects
-        from src.models.project import Project
-        projects = Project.query.filter_by(client_id=client_id).all()
+        # Get client with its projects; the status counts below reuse them
+        client = Client.query_with_relations('projects').get_or_404(client_id)
+        projects = client.projects
         
         # Calculate portfolio performance
         portfolio_performance = client.calculate_portfolio_performance()
@@ -380,7 +383,7 @@ def get_top_investors():
         
         return jsonify({
             'success': True,
-            'top_investors': [client.to_dict() for client in clients]
+            'top_investors': Client.serialize_many(clients)
         })
         
     except Exception as e:
@@ -399,7 +402,7 @@ def get_clients_by_roi():
         
         return jsonify({
             'success': True,
-            'top_roi_clients': [client.to_dict() for client in clients]
+            'top_roi_clients': Client.serialize_many(clients)
         })
         
     except Exception as e:
@@ -1,12 +1,45 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
 from flask_cors import cross_origin
 from src.models.project import db, Project, ProjectImage, ProjectAnalytics
 from src.models.client import Client
 from datetime import datetime, date
-import json
+import secrets
 
 projects_bp = Blueprint('projects', __name__)
 
+def _stream_projects(envelope, projects):
+    """Stream envelope plus a 'projects' array as JSON, one project at a time
+
+    projects is a yield_per query, so only one batch of rows is held in
+    memory while the array is written. Everything is encoded by the app's
+    JSON provider, so the body is the one jsonify() would produce (which is
+    used directly when the provider pretty-prints, in debug mode). Errors
+    raised after the first chunk can no longer become a JSON 500; the
+    connection is cut instead.
+    """
+    json = current_app.json
+    if (json.compact is None and current_app.debug) or json.compact is False:
+        # jsonify() pretty-prints here, which the streamed chunks can't match
+        return jsonify(dict(envelope, projects=[project.to_dict() for project in projects]))
+    
+    # Encode the envelope around a random placeholder (so no request value
+    # can match it) to find where the array goes
+    placeholder = json.dumps(secrets.token_hex(16))
+    head, tail = json.dumps(dict(envelope, projects=json.loads(placeholder))).split(placeholder)
+    
+    def generate():
+        yield (head + '[').encode('utf-8')
+        separator = ''
+        for project in projects:
+            yield (separator + json.dumps(project.to_dict())).encode('utf-8')
+            separator = ','
+        yield (']' + tail + '\n').encode('utf-8')
+    
+    return current_app.response_class(
+        stream_with_context(generate()),
+        mimetype='application/json'
+    )
+
 @projects_bp.route('/projects', methods=['GET'])
 @cross_origin()
 def get_projects():
@@ -37,11 +70,11 @@ def get_projects():
         if limit:
             query = query.limit(limit)
         
-        projects = query.all()
+        projects = Project.rows_as_dicts(query)
         
         return jsonify({
             'success': True,
-            'projects': [project.to_dict() for project in projects],
+            'projects': projects,
             'total': len(projects)
         })
         
@@ -251,13 +284,12 @@ def get_projects_by_category(category):
     """Get projects by category"""
     try:
         limit = request.args.get('limit', type=int)
-        projects = Project.get_by_category(category, limit)
+        projects = Project.iter_by_category(category, limit)
         
-        return jsonify({
+        return _stream_projects({
             'success': True,
-            'projects': [project.to_dict() for project in projects],
             'category': category
-        })
+        }, projects)
         
     except Exception as e:
         return jsonify({
@@ -275,18 +307,17 @@ def search_projects():
         property_type = request.args.get('property_type')
         category = request.args.get('category')
         
-        projects = Project.search_projects(query_text, location, property_type, category)
+        projects = Project.iter_search_projects(query_text, location, property_type, category)
         
-        return jsonify({
+        return _stream_projects({
             'success': True,
-            'projects': [project.to_dict() for project in projects],
             'query': query_text,
             'filters': {
                 'location': location,
                 'property_type': property_type,
                 'category': category
             }
-        })
+        }, projects)
         
     except Exception as e:
         return jsonify({
@@ -0,0 +1,52 @@
+"""Request body schemas for the ESKLENCHEN API.
+
+Bodies are decoded straight into these structs with msgspec, which parses
+and validates the JSON in one pass. Defaults mirror the values the
+handlers used to fall back to; fields without a default are required.
+"""
+from typing import Annotated, Optional
+
+import msgspec
+
+
+# A contact submission without these is useless, so reject it up front
+NonEmptyStr = Annotated[str, msgspec.Meta(min_length=1)]
+
+
+class ContactRequest(msgspec.Struct):
+    name: NonEmptyStr
+    email: NonEmptyStr
+    message: NonEmptyStr
+    phone: Optional[str] = None
+    form_type: str = 'general'
+
+
+# The deployed landing page (src/main.py) has always acknowledged partial
+# form posts, so its contact endpoint keeps every field optional
+class PartialContactRequest(msgspec.Struct):
+    name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    message: Optional[str] = None
+    form_type: str = 'general'
+
+
+class PropertyAnalysisRequest(msgspec.Struct):
+    location: str = 'Barcelona'
+    surface: float = 80.0
+    rooms: int = 3
+
+
+class RenovationProposalRequest(msgspec.Struct):
+    property_type: str = 'apartment'
+    budget: float = 50000.0
+
+
+def decode(data, schema):
+    """Decode a JSON request body into schema.
+
+    Numeric strings such as "80" are accepted for numeric fields, as forms
+    often send them that way. Raises msgspec.DecodeError (or its subclass
+    ValidationError) for malformed or mistyped bodies.
+    """
+    return msgspec.json.decode(data, type=schema, strict=False)
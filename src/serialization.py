@@ -0,0 +1,70 @@
+"""JSON encoding helpers shared by the ESKLENCHEN Flask apps.
+
+orjson is used when it is installed; otherwise the stdlib json module is
+used so the apps keep working in minimal environments.
+"""
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson as _json
+except ImportError:  # pragma: no cover - exercised only without orjson
+    _json = None
+
+JSONDecodeError = json.JSONDecodeError
+
+
+if _json is not None:
+    def dumps(obj):
+        """Serialize obj to UTF-8 encoded JSON bytes"""
+        return _json.dumps(obj)
+
+    def loads(data):
+        """Parse JSON from bytes or str"""
+        return _json.loads(data)
+else:
+    def dumps(obj):
+        """Serialize obj to UTF-8 encoded JSON bytes"""
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def loads(data):
+        """Parse JSON from bytes or str"""
+        return json.loads(data)
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson when it is installed
+
+    Output is equivalent to Flask's default provider (sorted keys, HTTP
+    dates for datetimes, the same fallback types), except that non-ASCII
+    text is emitted as UTF-8 rather than \\u escapes.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if _json is None or not kwargs.keys() <= {'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj, indent=kwargs.get('indent')).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if _json is None or kwargs:
+            return super().loads(s, **kwargs)
+        return _json.loads(s)
+
+    def response(self, *args, **kwargs):
+        if _json is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self._encode(obj, indent=indent) + b'\n', mimetype=self.mimetype
+        )
+
+    def _encode(self, obj, indent=False):
+        # Datetimes go through self.default so they keep Flask's format
+        option = _json.OPT_PASSTHROUGH_DATETIME | _json.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= _json.OPT_SORT_KEYS
+        if indent:
+            option |= _json.OPT_INDENT_2
+        return _json.dumps(obj, default=self.default, option=option)
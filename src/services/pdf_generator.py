@@ -12,7 +12,8 @@ from reportlab.graphics.charts.piecharts import Pie
 from reportlab.graphics.charts.linecharts import HorizontalLineChart
 from datetime import datetime, date
 import os
-import json
+
+from src.serialization import loads
 
 class ESKLENCHENPDFGenerator:
     """Professional PDF generator for ESKLENCHEN reports"""
@@ -31,6 +32,20 @@ class ESKLENCHENPDFGenerator:
         
         self.styles = self._create_styles()
         
+        # Every project row in a portfolio report shares the same table style
+        self._project_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), self.colors['light_grey']),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 0.5, grey),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 6),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 4),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ])
+        
     def _create_styles(self):
         """Create custom styles for ESKLENCHEN documents"""
         styles = getSampleStyleSheet()
@@ -232,7 +247,7 @@ class ESKLENCHENPDFGenerator:
             recommendations = valuation_data.get('ai_recommendations', [])
             if isinstance(recommendations, str):
                 try:
-                    recommendations = json.loads(recommendations)
+                    recommendations = loads(recommendations)
                 except:
                     recommendations = []
             
@@ -246,7 +261,7 @@ class ESKLENCHENPDFGenerator:
             risk_factors = valuation_data.get('risk_factors', [])
             if isinstance(risk_factors, str):
                 try:
-                    risk_factors = json.loads(risk_factors)
+                    risk_factors = loads(risk_factors)
                 except:
                     risk_factors = []
             
@@ -393,18 +408,7 @@ class ESKLENCHENPDFGenerator:
                     ]
                     
                     project_table = Table(project_details, colWidths=[3*cm, 4*cm])
-                    project_table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (0, -1), self.colors['light_grey']),
-                        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                        ('FONTSIZE', (0, 0), (-1, -1), 9),
-                        ('GRID', (0, 0), (-1, -1), 0.5, grey),
-                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                        ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                        ('TOPPADDING', (0, 0), (-1, -1), 4),
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                    ]))
+                    project_table.setStyle(self._project_table_style)
                     
                     story.append(project_table)
                     story.append(Spacer(1, 15))
@@ -0,0 +1,22 @@
+"""Helpers for serving the React build from the ESKLENCHEN Flask apps."""
+import os
+import threading
+
+# index.html bytes per path, re-read only when the file's mtime changes
+_INDEX_CACHE = {}
+_INDEX_LOCK = threading.Lock()
+
+
+def load_index(path):
+    """Return (data, etag) for index.html, reloading it if it changed on disk"""
+    mtime = os.stat(path).st_mtime
+    cached = _INDEX_CACHE.get(path)
+    if cached is None or cached[0] != mtime:
+        with _INDEX_LOCK:
+            cached = _INDEX_CACHE.get(path)
+            if cached is None or cached[0] != mtime:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                cached = (mtime, data, f"{mtime}-{len(data)}")
+                _INDEX_CACHE[path] = cached
+    return cached[1], cached[2]